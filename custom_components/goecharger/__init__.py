@@ -1,18 +1,54 @@
 """go-eCharger integration"""
 
+import aiohttp
+import asyncio
 import voluptuous as vol
 import ipaddress
 import logging
 from datetime import timedelta
 import homeassistant.helpers.config_validation as cv
-from homeassistant.const import CONF_HOST, CONF_SCAN_INTERVAL
-from homeassistant.core import valid_entity_id
+from homeassistant.const import CONF_HOST, CONF_SCAN_INTERVAL, EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import SupportsResponse, valid_entity_id
 from homeassistant import core
 from homeassistant.helpers.discovery import async_load_platform
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-
-from .const import DOMAIN, CONF_SERIAL, CONF_CHARGERS, CONF_CORRECTION_FACTOR, CONF_NAME, CHARGER_API
-from goecharger import GoeCharger
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    CONF_SERIAL,
+    CONF_CHARGERS,
+    CONF_CORRECTION_FACTOR,
+    CONF_NAME,
+    CONF_MAX_PARALLEL_REQUESTS,
+    CONF_REQUEST_TIMEOUT,
+    CONF_FAST_SCAN_INTERVAL,
+    CONF_STATIC_SCAN_INTERVAL,
+    CONF_MQTT_TOPIC,
+    CONF_PUSH_FALLBACK_INTERVAL,
+    CONF_IDLE_SCAN_INTERVAL,
+    CONF_NO_CAR_SCAN_INTERVAL,
+    CONF_WRITE_COALESCE_WINDOW,
+    CONF_LOAD_BALANCING,
+    CONF_SITE_LIMIT,
+    CONF_PHASE_LIMITS,
+    CONF_MIN_CURRENT,
+    CONF_TELEMETRY_INTERVAL,
+)
+from .allocation import MIN_CURRENT
+from .api import GoeChargerApi, async_get_client
+from .balancer import LoadBalancer
+from .coordinator import (
+    async_create_coordinator,
+    async_remove_coordinator,
+    async_schedule_start,
+    async_start_chargers,
+)
+from .polling import PollTiers
+from .powerbuffer import RESOLUTIONS
+from .sessions import async_remove_session_history
+from .store import async_remove_saved_state
+from .telemetry import async_start_telemetry_summaries
+from .writer import async_get_writer
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -22,9 +58,25 @@ SET_ABSOLUTE_MAX_CURRENT_ATTR = "charger_absolute_max_current"
 CHARGE_LIMIT = "charge_limit"
 SET_MAX_CURRENT_ATTR = "max_current"
 CHARGER_NAME_ATTR = "charger_name"
+SESSIONS_START_ATTR = "start"
+SESSIONS_END_ATTR = "end"
+CARD_ID_ATTR = "card_id"
+RESOLUTION_ATTR = "resolution"
 
 MIN_UPDATE_INTERVAL = timedelta(seconds=10)
 DEFAULT_UPDATE_INTERVAL = timedelta(seconds=20)
+MIN_FAST_UPDATE_INTERVAL = timedelta(seconds=2)
+DEFAULT_STATIC_UPDATE_INTERVAL = timedelta(minutes=5)
+DEFAULT_PUSH_FALLBACK_INTERVAL = timedelta(minutes=5)
+DEFAULT_MAX_PARALLEL_REQUESTS = 8
+DEFAULT_REQUEST_TIMEOUT = timedelta(seconds=10)
+DEFAULT_WRITE_COALESCE_WINDOW = timedelta(seconds=0)
+SERIAL_DISCOVERY_TIMEOUT = timedelta(seconds=10)
+SERIAL_DISCOVERY_RETRY_INTERVAL = timedelta(minutes=1)
+DEFAULT_TELEMETRY_INTERVAL = timedelta(minutes=5)
+MIN_TELEMETRY_INTERVAL = timedelta(seconds=10)
+
+PLATFORMS = ["sensor", "switch"]
 
 CONFIG_SCHEMA = vol.Schema(
     {
@@ -38,6 +90,10 @@ CONFIG_SCHEMA = vol.Schema(
                             vol.Optional(
                                 CONF_CORRECTION_FACTOR, default="1.0"
                             ): vol.All(cv.string),
+                            vol.Optional(CONF_SCAN_INTERVAL): vol.All(
+                                cv.time_period, vol.Clamp(min=MIN_UPDATE_INTERVAL)
+                            ),
+                            vol.Optional(CONF_MQTT_TOPIC): vol.All(cv.string),
                         })
                     ]
                 ]),
@@ -49,6 +105,43 @@ CONFIG_SCHEMA = vol.Schema(
                 vol.Optional(
                     CONF_SCAN_INTERVAL, default=DEFAULT_UPDATE_INTERVAL
                 ): vol.All(cv.time_period, vol.Clamp(min=MIN_UPDATE_INTERVAL)),
+                vol.Optional(CONF_FAST_SCAN_INTERVAL): vol.All(
+                    cv.time_period, vol.Clamp(min=MIN_FAST_UPDATE_INTERVAL)
+                ),
+                vol.Optional(
+                    CONF_STATIC_SCAN_INTERVAL, default=DEFAULT_STATIC_UPDATE_INTERVAL
+                ): vol.All(cv.time_period, vol.Clamp(min=MIN_UPDATE_INTERVAL)),
+                vol.Optional(CONF_IDLE_SCAN_INTERVAL): vol.All(
+                    cv.time_period, vol.Clamp(min=MIN_UPDATE_INTERVAL)
+                ),
+                vol.Optional(CONF_NO_CAR_SCAN_INTERVAL): vol.All(
+                    cv.time_period, vol.Clamp(min=MIN_UPDATE_INTERVAL)
+                ),
+                vol.Optional(
+                    CONF_PUSH_FALLBACK_INTERVAL, default=DEFAULT_PUSH_FALLBACK_INTERVAL
+                ): vol.All(cv.time_period, vol.Clamp(min=MIN_UPDATE_INTERVAL)),
+                vol.Optional(
+                    CONF_WRITE_COALESCE_WINDOW, default=DEFAULT_WRITE_COALESCE_WINDOW
+                ): vol.All(cv.time_period),
+                vol.Optional(
+                    CONF_TELEMETRY_INTERVAL, default=DEFAULT_TELEMETRY_INTERVAL
+                ): vol.All(cv.time_period, vol.Clamp(min=MIN_TELEMETRY_INTERVAL)),
+                vol.Optional(
+                    CONF_MAX_PARALLEL_REQUESTS, default=DEFAULT_MAX_PARALLEL_REQUESTS
+                ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                vol.Optional(
+                    CONF_REQUEST_TIMEOUT, default=DEFAULT_REQUEST_TIMEOUT
+                ): vol.All(cv.time_period, vol.Clamp(min=timedelta(seconds=1))),
+                vol.Optional(CONF_LOAD_BALANCING): vol.Schema({
+                    vol.Required(CONF_SITE_LIMIT): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Optional(CONF_PHASE_LIMITS): vol.All(
+                        [vol.All(vol.Coerce(float), vol.Range(min=0))], vol.Length(min=3, max=3)
+                    ),
+                    vol.Optional(CONF_MIN_CURRENT, default=MIN_CURRENT): vol.All(
+                        vol.Coerce(int), vol.Range(min=6, max=32)
+                    ),
+                    vol.Optional(CONF_CHARGERS): vol.All(cv.ensure_list, [cv.string]),
+                }),
             }
         )
     },
@@ -61,42 +154,88 @@ async def async_setup_entry(hass, config):
     _LOGGER.debug(repr(config.data))
 
     name = config.data[CONF_NAME]
-    charger = GoeCharger(config.data[CONF_HOST])
-    hass.data[DOMAIN]["api"][name] = charger
+    scanInterval = max(
+        timedelta(seconds=config.data.get(CONF_SCAN_INTERVAL, DEFAULT_UPDATE_INTERVAL.seconds)), MIN_UPDATE_INTERVAL
+    )
+    _async_add_charger(hass, name, config.data[CONF_HOST], scanInterval, config.data.get(CONF_MQTT_TOPIC))
 
-    await hass.data[DOMAIN]["coordinator"].async_refresh()
+    # the entities are available as soon as the saved state is restored, setup does not wait for it.
+    # The chargers of all entries set up at the same time are started with one sweep.
+    async_schedule_start(hass, name)
 
-    hass.async_create_task(
-        hass.config_entries.async_forward_entry_setup(config, "sensor")
-    )
-    hass.async_create_task(
-        hass.config_entries.async_forward_entry_setup(config, "switch")
-    )
+    await hass.config_entries.async_forward_entry_setups(config, PLATFORMS)
     return True
 
 
 async def async_unload_entry(hass, entry):
     _LOGGER.debug(f"Unloading charger '{entry.data[CONF_NAME]}")
-    hass.data[DOMAIN]["api"].pop(entry.data[CONF_NAME])
+    if not await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
+        return False
+    async_remove_coordinator(hass, entry.data[CONF_NAME])
+    # the fleet metric sensors are created again by the next entry which is set up
+    if hass.data[DOMAIN].get("fleet_metric_sensors") == entry.entry_id:
+        hass.data[DOMAIN].pop("fleet_metric_sensors")
     return True
 
 
-class ChargerStateFetcher:
-    def __init__(self, hass):
-        self._hass = hass
-
-    async def fetch_states(self):
-        _LOGGER.debug('Updating status...')
-        goeChargers = self._hass.data[DOMAIN]["api"]
-        data = self.coordinator.data if self.coordinator.data else {}
-        for chargerName in goeChargers.keys():
-            _LOGGER.debug(f"update for '{chargerName}'..")
-            fetchedStatus = await self._hass.async_add_executor_job(goeChargers[chargerName].requestStatus)
-            if fetchedStatus.get("car_status", "unknown") != "unknown":
-                data[chargerName] = fetchedStatus
-            else:
-                _LOGGER.error(f"Unable to fetch state for Charger {chargerName}")
-        return data
+async def async_remove_entry(hass, entry):
+    """Remove the saved state and the session history of a deleted charger."""
+    await async_remove_saved_state(hass, entry.data[CONF_NAME])
+    await async_remove_session_history(hass, entry.data[CONF_NAME])
+
+
+def _async_add_charger(hass, chargerName, host, scanInterval, mqttTopic=None, goeCharger=None):
+    """Get the client and create the coordinator and, if a topic is configured, the push listener of a charger."""
+    settings = hass.data[DOMAIN]
+    if mqttTopic:
+        # pushed updates replace the polls, which are only a fallback
+        pollInterval = max(scanInterval, settings["push_fallback_interval"])
+        pollTiers = PollTiers(pollInterval, pollInterval, settings["static_scan_interval"])
+    else:
+        pollTiers = PollTiers(
+            settings["fast_scan_interval"] or scanInterval,
+            scanInterval,
+            settings["static_scan_interval"],
+            settings["idle_scan_interval"],
+            settings["no_car_scan_interval"],
+        )
+    coordinator = async_create_coordinator(hass, chargerName, goeCharger or async_get_client(hass, host), pollTiers)
+    if settings.get("balancer") is not None:
+        settings["balancer"].async_add_charger(chargerName, coordinator)
+
+    if mqttTopic:
+        from .push import ChargerPushListener
+
+        pushListener = ChargerPushListener(hass, chargerName, coordinator, mqttTopic)
+        settings["push"][chargerName] = pushListener
+        hass.async_create_task(pushListener.async_start())
+    return coordinator
+
+
+async def _async_add_discovered_charger(hass, config, host, correctionFactor, scanInterval):
+    """Add the charger configured by host only, named by its serial number as soon as it answers."""
+    goeCharger = async_get_client(hass, host)
+    while True:
+        status = await goeCharger.requestStatus(timeout=SERIAL_DISCOVERY_TIMEOUT.total_seconds())
+        serial = status.get("serial_number")
+        if status and serial:
+            break
+        _LOGGER.warning(
+            f"Unable to get the serial number of charger '{host}', "
+            f"retrying in {SERIAL_DISCOVERY_RETRY_INTERVAL.total_seconds():.0f} seconds"
+        )
+        await asyncio.sleep(SERIAL_DISCOVERY_RETRY_INTERVAL.total_seconds())
+
+    _LOGGER.debug(f"charger '{host}' has serial '{serial}'")
+    coordinator = _async_add_charger(hass, serial, host, scanInterval, goeCharger=goeCharger)
+    await hass.data[DOMAIN]["sessions"][serial].async_start()
+    # the status of the discovery is the first data, no need to poll again
+    coordinator.async_set_updated_data(status)
+    charger = [{CONF_NAME: serial, CONF_HOST: host, CONF_CORRECTION_FACTOR: correctionFactor}]
+    for platform in ("sensor", "switch"):
+        await async_load_platform(
+            hass, platform, DOMAIN, {CONF_CHARGERS: [charger]}, config
+        )
 
 
 async def async_setup(hass: core.HomeAssistant, config: dict) -> bool:
@@ -104,15 +243,37 @@ async def async_setup(hass: core.HomeAssistant, config: dict) -> bool:
 
     _LOGGER.debug("async_setup")
     scan_interval = DEFAULT_UPDATE_INTERVAL
-
-    hass.data[DOMAIN] = {}
-    chargerApi = {}
+    maxParallelRequests = DEFAULT_MAX_PARALLEL_REQUESTS
+    requestTimeout = DEFAULT_REQUEST_TIMEOUT
+    fastScanInterval = None
+    staticScanInterval = DEFAULT_STATIC_UPDATE_INTERVAL
+    pushFallbackInterval = DEFAULT_PUSH_FALLBACK_INTERVAL
+    idleScanInterval = None
+    noCarScanInterval = None
+    writeCoalesceWindow = DEFAULT_WRITE_COALESCE_WINDOW
+    telemetryInterval = DEFAULT_TELEMETRY_INTERVAL
+
+    hass.data[DOMAIN] = {
+        "api": {}, "clients": {}, "coordinators": {}, "push": {}, "writers": {}, "stores": {}, "state_stores": {},
+        "sessions": {}, "telemetry": {},
+        "pending_starts": [],
+    }
     chargers = []
+    discoverHost = None
     if DOMAIN in config:
         scan_interval = config[DOMAIN].get(CONF_SCAN_INTERVAL, DEFAULT_UPDATE_INTERVAL)
+        maxParallelRequests = config[DOMAIN].get(CONF_MAX_PARALLEL_REQUESTS, DEFAULT_MAX_PARALLEL_REQUESTS)
+        requestTimeout = config[DOMAIN].get(CONF_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT)
+        fastScanInterval = config[DOMAIN].get(CONF_FAST_SCAN_INTERVAL)
+        staticScanInterval = config[DOMAIN].get(CONF_STATIC_SCAN_INTERVAL, DEFAULT_STATIC_UPDATE_INTERVAL)
+        pushFallbackInterval = config[DOMAIN].get(CONF_PUSH_FALLBACK_INTERVAL, DEFAULT_PUSH_FALLBACK_INTERVAL)
+        idleScanInterval = config[DOMAIN].get(CONF_IDLE_SCAN_INTERVAL)
+        noCarScanInterval = config[DOMAIN].get(CONF_NO_CAR_SCAN_INTERVAL)
+        writeCoalesceWindow = config[DOMAIN].get(CONF_WRITE_COALESCE_WINDOW, DEFAULT_WRITE_COALESCE_WINDOW)
+        telemetryInterval = config[DOMAIN].get(CONF_TELEMETRY_INTERVAL, DEFAULT_TELEMETRY_INTERVAL)
 
         host = config[DOMAIN].get(CONF_HOST, False)
-        serial = config[DOMAIN].get(CONF_SERIAL, "unknown")
+        serial = config[DOMAIN].get(CONF_SERIAL)
         try:
             correctionFactor = float(config[DOMAIN].get(CONF_CORRECTION_FACTOR, "1.0"))
         except:
@@ -122,37 +283,186 @@ async def async_setup(hass: core.HomeAssistant, config: dict) -> bool:
         chargers = config[DOMAIN].get(CONF_CHARGERS, [])
 
         if host:
-            if not serial:
-                goeCharger = GoeCharger(host)
-                status = goeCharger.requestStatus()
-                serial = status["serial_number"]
-            chargers.append([{CONF_NAME: serial, CONF_HOST: host, CONF_CORRECTION_FACTOR: correctionFactor}])
+            if serial:
+                chargers.append([{CONF_NAME: serial, CONF_HOST: host, CONF_CORRECTION_FACTOR: correctionFactor}])
+            else:
+                # the serial is the name of the charger, it is added once the serial is known
+                discoverHost = host
         _LOGGER.debug(repr(chargers))
 
-        for charger in chargers:
-            chargerName = charger[0][CONF_NAME]
-            host = charger[0][CONF_HOST]
-            _LOGGER.debug(f"charger: '{chargerName}' host: '{host}' ")
+    hass.data[DOMAIN]["semaphore"] = asyncio.Semaphore(maxParallelRequests)
+    hass.data[DOMAIN]["request_timeout"] = requestTimeout
+    hass.data[DOMAIN]["fast_scan_interval"] = fastScanInterval
+    hass.data[DOMAIN]["static_scan_interval"] = staticScanInterval
+    hass.data[DOMAIN]["push_fallback_interval"] = pushFallbackInterval
+    hass.data[DOMAIN]["idle_scan_interval"] = idleScanInterval
+    hass.data[DOMAIN]["no_car_scan_interval"] = noCarScanInterval
+    hass.data[DOMAIN]["write_coalesce_window"] = writeCoalesceWindow
+    hass.data[DOMAIN]["balancer"] = None
+    async_start_telemetry_summaries(hass, telemetryInterval)
+    if DOMAIN in config and CONF_LOAD_BALANCING in config[DOMAIN]:
+        loadBalancing = config[DOMAIN][CONF_LOAD_BALANCING]
+        phaseLimits = [
+            min(loadBalancing[CONF_SITE_LIMIT], phaseLimit)
+            for phaseLimit in loadBalancing.get(CONF_PHASE_LIMITS, [loadBalancing[CONF_SITE_LIMIT]] * 3)
+        ]
+        balancer = hass.data[DOMAIN]["balancer"] = LoadBalancer(
+            hass, phaseLimits, loadBalancing[CONF_MIN_CURRENT], loadBalancing.get(CONF_CHARGERS)
+        )
+        await balancer.async_restore()
 
-            goeCharger = GoeCharger(host)
-            chargerApi[chargerName] = goeCharger
+        @core.callback
+        def stopBalancer(_event):
+            balancer.async_stop()
 
-    hass.data[DOMAIN]["api"] = chargerApi
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, stopBalancer)
 
-    chargeStateFecher = ChargerStateFetcher(hass)
+    for charger in chargers:
+        chargerName = charger[0][CONF_NAME]
+        host = charger[0][CONF_HOST]
+        chargerScanInterval = charger[0].get(CONF_SCAN_INTERVAL, scan_interval)
+        _LOGGER.debug(f"charger: '{chargerName}' host: '{host}' ")
 
-    coordinator = DataUpdateCoordinator(
-        hass,
-        _LOGGER,
-        name=DOMAIN,
-        update_method=chargeStateFecher.fetch_states,
-        update_interval=scan_interval,
-    )
-    chargeStateFecher.coordinator = coordinator
+        _async_add_charger(hass, chargerName, host, chargerScanInterval, charger[0].get(CONF_MQTT_TOPIC))
+
+    chargerNames = list(hass.data[DOMAIN]["api"])
+    # entities are created right away and become available with the restored state or the first refresh
+    if chargerNames:
+        hass.async_create_background_task(
+            async_start_chargers(hass, chargerNames), f"{DOMAIN} start {len(chargerNames)} chargers"
+        )
+    if discoverHost:
+        hass.async_create_background_task(
+            _async_add_discovered_charger(hass, config, discoverHost, correctionFactor, scan_interval),
+            f"{DOMAIN} serial discovery {discoverHost}",
+        )
 
-    hass.data[DOMAIN]["coordinator"] = coordinator
+    def _chargerNames(chargerNameInput):
+        """Names of the chargers a service call applies to."""
+        if len(chargerNameInput) > 0:
+            return [chargerNameInput]
+        return list(hass.data[DOMAIN]["api"].keys())
+
+    def _parseInput(call, attribute, convert):
+        """Value of a service field given as number, numeric string or entity id, None if not given."""
+        value = call.data.get(attribute)
+        if value is None:
+            return None
+        if isinstance(value, str) and valid_entity_id(value):
+            value = hass.states.get(value).state
+        try:
+            return convert(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"No valid value for '{attribute}': {value}")
+
+    def _parseTime(call, attribute):
+        """Seconds since the epoch of a service field given as date and time, None if not given."""
+        value = call.data.get(attribute)
+        if value is None:
+            return None
+        value = cv.datetime(value)
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+        return value.timestamp()
+
+    async def async_handle_get_sessions(call):
+        """Return the charging sessions within a time range, optionally only those of one card."""
+        start = _parseTime(call, SESSIONS_START_ATTR)
+        end = _parseTime(call, SESSIONS_END_ATTR)
+        card = _parseInput(call, CARD_ID_ATTR, int)
+        sessions = []
+        for chargerName in _chargerNames(call.data.get(CHARGER_NAME_ATTR, '')):
+            tracker = hass.data[DOMAIN]["sessions"].get(chargerName)
+            if tracker is None:
+                continue
+            for session in tracker.query(start, end, card):
+                sessions.append({
+                    CHARGER_NAME_ATTR: chargerName,
+                    SESSIONS_START_ATTR: dt_util.utc_from_timestamp(session.start).isoformat(),
+                    SESSIONS_END_ATTR: (
+                        dt_util.utc_from_timestamp(session.end).isoformat() if session.end is not None else None
+                    ),
+                    "energy": round(session.energy, 3),
+                    "peak_power": round(session.peakPower, 2),
+                    CARD_ID_ATTR: session.card,
+                })
+        sessions.sort(key=lambda session: session[SESSIONS_START_ATTR])
+        return {"sessions": sessions}
+
+    async def async_handle_get_power_telemetry(call):
+        """Return the power telemetry of a charger in a time range and resolution."""
+        chargerName = call.data.get(CHARGER_NAME_ATTR, '')
+        telemetry = hass.data[DOMAIN]["telemetry"].get(chargerName)
+        if telemetry is None:
+            raise ValueError(f"No charger '{chargerName}'")
+        resolution = call.data.get(RESOLUTION_ATTR)
+        if resolution is not None and resolution not in RESOLUTIONS:
+            raise ValueError(f"No valid resolution: {resolution}, use one of {', '.join(RESOLUTIONS)}")
+        result = telemetry.buffer.query(
+            _parseTime(call, SESSIONS_START_ATTR), _parseTime(call, SESSIONS_END_ATTR), resolution
+        )
+        # the values are stored as float32, kW with more than 3 decimals is noise
+        for key, values in result.items():
+            if isinstance(values, dict):
+                result[key] = {name: [round(value, 3) for value in column] for name, column in values.items()}
+            elif key != 'time' and isinstance(values, list):
+                result[key] = [round(value, 3) for value in values]
+        return result
+
+    async def async_handle_set_parameters(call):
+        """Handle the service call to set several parameters with one call per charger."""
+        chargerNameInput = call.data.get(CHARGER_NAME_ATTR, '')
+        try:
+            maxCurrent = _parseInput(call, SET_MAX_CURRENT_ATTR, lambda value: int(float(value)))
+            absoluteMaxCurrent = _parseInput(call, SET_ABSOLUTE_MAX_CURRENT_ATTR, lambda value: int(float(value)))
+            chargeLimit = _parseInput(call, CHARGE_LIMIT, float)
+            cableLockMode = _parseInput(call, SET_CABLE_LOCK_MODE_ATTR, lambda value: int(float(value)))
+        except ValueError as e:
+            _LOGGER.error(e)
+            return
+        if maxCurrent is None and absoluteMaxCurrent is None and chargeLimit is None and cableLockMode is None:
+            _LOGGER.warning("set_parameters called without any parameter")
+            return
+        if cableLockMode is not None:
+            cableLockMode = GoeChargerApi.CableLockMode(min(max(cableLockMode, 0), 2))
+
+        async def setChargerParameters(chargerName):
+            goeCharger = hass.data[DOMAIN]["api"].get(chargerName)
+            if goeCharger is None:
+                _LOGGER.error(f"Charger with name '{chargerName}' not found!")
+                return
+            _LOGGER.debug(
+                f"set parameters for charger '{chargerName}': max_current={maxCurrent}, "
+                f"absolute_max_current={absoluteMaxCurrent}, charge_limit={chargeLimit}, cable_lock_mode={cableLockMode}"
+            )
+            try:
+                result = await goeCharger.setParameters(maxCurrent, absoluteMaxCurrent, chargeLimit, cableLockMode)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                # one unreachable charger must not keep the others from being set
+                _LOGGER.error(f"Unable to set parameters of Charger {chargerName}: {e!r}")
+                return
+            hass.data[DOMAIN]["coordinators"][chargerName].async_apply_set_result(result)
+
+        chargerNames = _chargerNames(chargerNameInput)
+        await asyncio.gather(*[setChargerParameters(chargerName) for chargerName in chargerNames])
+
+    async def _async_write_chargers(chargerNameInput, parameter, value):
+        """Write a parameter to the chargers of a service call, the writers update their coordinators."""
+
+        async def writeCharger(chargerName):
+            _LOGGER.debug(f"set {parameter} for charger '{chargerName}' to {value}")
+            try:
+                writer = async_get_writer(hass, chargerName, parameter)
+            except KeyError:
+                _LOGGER.error(f"Charger with name '{chargerName}' not found!")
+                return
+            try:
+                await writer.async_write(value)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                # one unreachable charger must not keep the others from being written
+                _LOGGER.error(f"Unable to set {parameter} of Charger {chargerName}: {e!r}")
 
-    await coordinator.async_refresh()
+        await asyncio.gather(*[writeCharger(chargerName) for chargerName in _chargerNames(chargerNameInput)])
 
     async def async_handle_set_max_current(call):
         """Handle the service call to set the absolute max current."""
@@ -180,22 +490,7 @@ async def async_setup(hass: core.HomeAssistant, config: dict) -> bool:
         if maxCurrent > 32:
             maxCurrent = 32
 
-        if len(chargerNameInput) > 0:
-            _LOGGER.debug(f"set max_current for charger '{chargerNameInput}' to {maxCurrent}")
-            try:
-                await hass.async_add_executor_job(hass.data[DOMAIN]["api"][chargerNameInput].setTmpMaxCurrent, maxCurrent)
-            except KeyError:
-                _LOGGER.error(f"Charger with name '{chargerName}' not found!")
-
-        else:
-            for charger in hass.data[DOMAIN]["api"].keys():
-                try:
-                    _LOGGER.debug(f"set max_current for charger '{charger}' to {maxCurrent}")
-                    await hass.async_add_executor_job(hass.data[DOMAIN]["api"][charger].setTmpMaxCurrent, maxCurrent)
-                except KeyError:
-                    _LOGGER.error(f"Charger with name '{chargerName}' not found!")
-
-        await hass.data[DOMAIN]["coordinator"].async_refresh()
+        await _async_write_chargers(chargerNameInput, 'max_current', maxCurrent)
 
     async def async_handle_set_absolute_max_current(call):
         """Handle the service call to set the absolute max current."""
@@ -221,29 +516,10 @@ async def async_setup(hass: core.HomeAssistant, config: dict) -> bool:
         if absoluteMaxCurrent > 32:
             absoluteMaxCurrent = 32
 
-        if len(chargerNameInput) > 0:
-            _LOGGER.debug(f"set absolute_max_current for charger '{chargerNameInput}' to {absoluteMaxCurrent}")
-            try:
-                await hass.async_add_executor_job(
-                    hass.data[DOMAIN]["api"][chargerNameInput].setAbsoluteMaxCurrent, absoluteMaxCurrent
-                )
-            except KeyError:
-                _LOGGER.error(f"Charger with name '{chargerName}' not found!")
-
-        else:
-            for charger in hass.data[DOMAIN]["api"].keys():
-                try:
-                    _LOGGER.debug(f"set absolute_max_current for charger '{charger}' to {absoluteMaxCurrent}")
-                    await hass.async_add_executor_job(
-                        hass.data[DOMAIN]["api"][charger].setAbsoluteMaxCurrent, absoluteMaxCurrent
-                    )
-                except KeyError:
-                    _LOGGER.error(f"Charger with name '{chargerName}' not found!")
-
-        await hass.data[DOMAIN]["coordinator"].async_refresh()
+        await _async_write_chargers(chargerNameInput, 'absolute_max_current', absoluteMaxCurrent)
 
     async def async_handle_set_cable_lock_mode(call):
-        """Handle the service call to set the absolute max current."""
+        """Handle the service call to set the cable lock mode."""
         chargerNameInput = call.data.get(CHARGER_NAME_ATTR, '')
         cableLockModeInput = call.data.get(SET_CABLE_LOCK_MODE_ATTR, 0)
         if isinstance(cableLockModeInput, str):
@@ -261,30 +537,10 @@ async def async_setup(hass: core.HomeAssistant, config: dict) -> bool:
         else:
             cableLockMode = cableLockModeInput
 
-        cableLockModeEnum = GoeCharger.CableLockMode.UNLOCKCARFIRST
-        if cableLockModeInput == 1:
-            cableLockModeEnum = GoeCharger.CableLockMode.AUTOMATIC
-        if cableLockMode >= 2:
-            cableLockModeEnum = GoeCharger.CableLockMode.LOCKED
+        # the value of a GoeChargerApi.CableLockMode, like the cable_lock_mode of the status
+        cableLockMode = min(max(cableLockMode, 0), 2)
 
-        if len(chargerNameInput) > 0:
-            _LOGGER.debug(f"set set_cable_lock_mode for charger '{chargerNameInput}' to {cableLockModeEnum}")
-            try:
-                await hass.async_add_executor_job(
-                    hass.data[DOMAIN]["api"][chargerNameInput].setCableLockMode, cableLockModeEnum
-                )
-            except KeyError:
-                _LOGGER.error(f"Charger with name '{chargerName}' not found!")
-
-        else:
-            for charger in hass.data[DOMAIN]["api"].keys():
-                try:
-                    _LOGGER.debug(f"set set_cable_lock_mode for charger '{charger}' to {cableLockModeEnum}")
-                    await hass.async_add_executor_job(hass.data[DOMAIN]["api"][charger].setCableLockMode, cableLockModeEnum)
-                except KeyError:
-                    _LOGGER.error(f"Charger with name '{chargerName}' not found!")
-
-        await hass.data[DOMAIN]["coordinator"].async_refresh()
+        await _async_write_chargers(chargerNameInput, 'cable_lock_mode', cableLockMode)
 
     async def async_handle_set_charge_limit(call):
         """Handle the service call to set charge limit."""
@@ -306,22 +562,7 @@ async def async_setup(hass: core.HomeAssistant, config: dict) -> bool:
         if chargeLimit < 0:
             chargeLimit = 0
 
-        if len(chargerNameInput) > 0:
-            _LOGGER.debug(f"set set_charge_limit for charger '{chargerNameInput}' to {chargeLimit}")
-            try:
-                await hass.async_add_executor_job(hass.data[DOMAIN]["api"][chargerNameInput].setChargeLimit, chargeLimit)
-            except KeyError:
-                _LOGGER.error(f"Charger with name '{chargerName}' not found!")
-
-        else:
-            for charger in hass.data[DOMAIN]["api"].keys():
-                try:
-                    _LOGGER.debug(f"set set_charge_limit for charger '{charger}' to {chargeLimit}")
-                    await hass.async_add_executor_job(hass.data[DOMAIN]["api"][charger].setChargeLimit, chargeLimit)
-                except KeyError:
-                    _LOGGER.error(f"Charger with name '{chargerName}' not found!")
-
-        await hass.data[DOMAIN]["coordinator"].async_refresh()
+        await _async_write_chargers(chargerNameInput, 'charge_limit', chargeLimit)
 
     hass.services.async_register(DOMAIN, "set_max_current", async_handle_set_max_current)
     hass.services.async_register(
@@ -329,12 +570,19 @@ async def async_setup(hass: core.HomeAssistant, config: dict) -> bool:
     )
     hass.services.async_register(DOMAIN, "set_cable_lock_mode", async_handle_set_cable_lock_mode)
     hass.services.async_register(DOMAIN, "set_charge_limit", async_handle_set_charge_limit)
+    hass.services.async_register(DOMAIN, "set_parameters", async_handle_set_parameters)
+    hass.services.async_register(
+        DOMAIN, "get_sessions", async_handle_get_sessions, supports_response=SupportsResponse.ONLY
+    )
+    hass.services.async_register(
+        DOMAIN, "get_power_telemetry", async_handle_get_power_telemetry, supports_response=SupportsResponse.ONLY
+    )
 
     hass.async_create_task(async_load_platform(
-        hass, "sensor", DOMAIN, {CONF_CHARGERS: chargers, CHARGER_API: chargerApi}, config)
+        hass, "sensor", DOMAIN, {CONF_CHARGERS: chargers}, config)
     )
     hass.async_create_task(async_load_platform(
-        hass, "switch", DOMAIN, {CONF_CHARGERS: chargers, CHARGER_API: chargerApi}, config)
+        hass, "switch", DOMAIN, {CONF_CHARGERS: chargers}, config)
     )
 
     return True
@@ -0,0 +1,108 @@
+"""Fair sharing of the available current between chargers.
+
+Pure functions without Home Assistant dependencies, see tools/bench_allocation.py.
+"""
+import math
+from collections import Counter, namedtuple
+
+MIN_CURRENT = 6
+PHASES = (0, 1, 2)
+
+# maxCurrent: the most the charger and cable allow, phases: indices of the phases the car draws from,
+# charging: whether the car is charging right now, these keep their current before others get one
+ChargerDemand = namedtuple('ChargerDemand', ['name', 'maxCurrent', 'phases', 'charging'])
+
+
+def _priority(demand):
+    return (not demand.charging, demand.name)
+
+
+def _waterLevel(capCounts, budget):
+    """Largest level L with sum(min(cap, L) * count) <= budget, inf if all caps fit into the budget.
+
+    capCounts are (cap, count) pairs sorted by cap.
+    """
+    remaining = sum(count for _cap, count in capCounts)
+    used = 0
+    for cap, count in capCounts:
+        if used + cap * remaining > budget:
+            return (budget - used) / remaining
+        used += cap * count
+        remaining -= count
+    return math.inf
+
+
+def _admit(demands, phaseLimits, minCurrent):
+    """Chargers which get at least minCurrent, charging ones and then by name first."""
+    demands = [demand for demand in demands if demand.maxCurrent >= minCurrent]
+    needed = [0] * len(phaseLimits)
+    for phases, count in Counter(demand.phases for demand in demands).items():
+        for phase in phases:
+            needed[phase] += minCurrent * count
+    if all(need <= limit for need, limit in zip(needed, phaseLimits)):
+        return demands
+
+    headroom = list(phaseLimits)
+    admitted = []
+    for demand in sorted(demands, key=_priority):
+        for phase in demand.phases:
+            if headroom[phase] < minCurrent:
+                break
+        else:
+            for phase in demand.phases:
+                headroom[phase] -= minCurrent
+            admitted.append(demand)
+    return admitted
+
+
+def allocateCurrents(demands, phaseLimits, minCurrent=MIN_CURRENT):
+    """Share phaseLimits (ampere per phase) max-min fair between the demands.
+
+    Every charger either gets at least minCurrent or 0, if there is not enough current left
+    for it. Returns {name: current in whole ampere}.
+    """
+    allocation = {demand.name: 0 for demand in demands}
+    admitted = _admit(demands, phaseLimits, minCurrent)
+
+    # chargers on the same phases with the same maximum get the same current, so the filling
+    # works on groups of them instead of single chargers
+    groupCounts = Counter((demand.phases, demand.maxCurrent) for demand in admitted)
+    unfrozen = {}
+    for (phases, cap), count in sorted(groupCounts.items()):
+        unfrozen.setdefault(phases, []).append((cap, count))
+
+    # progressive filling: raise all chargers evenly until they hit their maximum or one of
+    # their phases is exhausted, then continue with the chargers which are left
+    groupLevels = {}
+    used = [0.0] * len(phaseLimits)
+    while unfrozen:
+        phaseLevels = {}
+        for phase in range(len(phaseLimits)):
+            capCounts = sorted(
+                capCount for phases, groupCapCounts in unfrozen.items() if phase in phases
+                for capCount in groupCapCounts
+            )
+            if capCounts:
+                phaseLevels[phase] = _waterLevel(capCounts, phaseLimits[phase] - used[phase])
+        level = min(phaseLevels.values())
+        saturated = {phase for phase, phaseLevel in phaseLevels.items() if phaseLevel == level}
+
+        stillUnfrozen = {}
+        for phases, capCounts in unfrozen.items():
+            frozenCurrent = sum(cap * count for cap, count in capCounts if cap <= level)
+            rest = [(cap, count) for cap, count in capCounts if cap > level]
+            if rest and not saturated.isdisjoint(phases):
+                groupLevels[phases] = level
+                frozenCurrent += level * sum(count for _cap, count in rest)
+            elif rest:
+                stillUnfrozen[phases] = rest
+            for phase in phases:
+                used[phase] += frozenCurrent
+        unfrozen = stillUnfrozen
+
+    # small epsilon against float errors like 5.9999999
+    currents = {
+        (phases, cap): math.floor(min(cap, groupLevels.get(phases, math.inf)) + 1e-9) for phases, cap in groupCounts
+    }
+    allocation.update((demand.name, currents[demand.phases, demand.maxCurrent]) for demand in admitted)
+    return allocation
@@ -0,0 +1,432 @@
+"""Async client for the local HTTP API of the go-eCharger."""
+import asyncio
+import json
+import logging
+import time
+from collections import namedtuple
+
+import aiohttp
+from homeassistant.core import callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from goecharger.goecharger import GoeCharger, GoeChargerStatusMapper
+
+from .const import DOMAIN
+from .metrics import ChargerMetrics
+from .scheduler import PRIORITY_COMMAND, PRIORITY_POLL, RequestScheduler
+
+_LOGGER = logging.getLogger(__name__)
+
+# seconds a status request may take, unless the client is created with the configured request_timeout
+REQUEST_TIMEOUT = 10
+SET_TIMEOUT = 10
+
+API_V1 = 1
+API_V2 = 2
+
+# keys of the v2 api which are needed to map a status key, the v1 only key 'stop_mode' has no v2 equivalent
+_V2_STATUS_KEYS = {
+    'car_status': ('car',),
+    'charger_max_current': ('amp',),
+    'charger_absolute_max_current': ('ama',),
+    'charger_err': ('err',),
+    'charger_access': ('acs',),
+    'allow_charging': ('alw',),
+    'stop_mode': (),
+    'cable_lock_mode': ('ust',),
+    'cable_max_current': ('cbl',),
+    'pre_contactor_l1': ('pha',),
+    'pre_contactor_l2': ('pha',),
+    'pre_contactor_l3': ('pha',),
+    'post_contactor_l1': ('pha',),
+    'post_contactor_l2': ('pha',),
+    'post_contactor_l3': ('pha',),
+    'charger_temp': ('tma',),
+    'charger_temp0': ('tma',),
+    'charger_temp1': ('tma',),
+    'charger_temp2': ('tma',),
+    'charger_temp3': ('tma',),
+    'current_session_charged_energy': ('wh',),
+    'charge_limit': ('dwo',),
+    'adapter': ('adi',),
+    'unlocked_by_card': ('trx',),
+    'energy_total': ('eto',),
+    'wifi': ('wst',),
+    'u_l1': ('nrg',),
+    'u_l2': ('nrg',),
+    'u_l3': ('nrg',),
+    'u_n': ('nrg',),
+    'i_l1': ('nrg',),
+    'i_l2': ('nrg',),
+    'i_l3': ('nrg',),
+    'p_l1': ('nrg',),
+    'p_l2': ('nrg',),
+    'p_l3': ('nrg',),
+    'p_n': ('nrg',),
+    'p_all': ('nrg',),
+    'lf_l1': ('nrg',),
+    'lf_l2': ('nrg',),
+    'lf_l3': ('nrg',),
+    'lf_n': ('nrg',),
+    'firmware': ('fwv',),
+    'serial_number': ('sse',),
+    'wifi_ssid': ('ccw',),
+    'wifi_enabled': ('wen',),
+    'timezone_offset': ('tof',),
+    'timezone_dst_offset': ('tds',),
+}
+
+# v1 parameters which can be set with one request to /api/set on v2 chargers
+_V2_SET_KEYS = {'amx': 'amp', 'ama': 'ama', 'dwo': 'dwo', 'ust': 'ust'}
+
+# v2 keys which have another name in v1
+_V1_KEYS = {'acs': 'ast', 'wh': 'dws', 'trx': 'uby', 'ccw': 'wss'}
+
+# status key and mapped value of a written v1 parameter
+_WRITTEN_STATUS = {
+    'amx': ('charger_max_current', int),
+    'ama': ('charger_absolute_max_current', int),
+    'alw': ('allow_charging', lambda value: 'on' if value == '1' else 'off'),
+    'dwo': ('charge_limit', lambda value: int(value) / 10.0),
+    'ust': ('cable_lock_mode', int),
+}
+
+# v2 error codes of the errors v1 knows, with their v1 code
+_V2_TO_V1_ERRORS = {0: '0', 1: '1', 2: '1', 3: '3', 8: '8'}
+# names of the v2 errors v1 does not know, in the style of GoeCharger.GO_ERR
+_V2_ERRORS = {
+    4: 'OVERVOLTAGE',
+    5: 'OVERCURRENT',
+    6: 'DIODE',
+    7: 'PP_INVALID',
+    9: 'CONTACTOR_STUCK',
+    10: 'CONTACTOR_MISS',
+    11: 'RCCB_UNKNOWN',
+    12: 'UNKNOWN',
+    13: 'OVERTEMPERATURE',
+    14: 'NO_COMMUNICATION',
+    15: 'LOCK_STUCK_OPEN',
+    16: 'LOCK_STUCK_LOCKED',
+}
+
+# status after a set call: the full status the charger answered with (confirmed)
+# or, if the answer was not a status, only the written values
+SetResult = namedtuple('SetResult', ['status', 'confirmed'])
+
+
+def _flag(value):
+    return '1' if value else '0'
+
+
+def _v2ToV1Status(status):
+    """Convert a v2 status into the v1 format, so it can be mapped by GoeChargerStatusMapper."""
+    v1Status = {}
+    for key in ('car', 'amp', 'ama', 'ust', 'cbl', 'wst', 'tds'):
+        if status.get(key) is not None:
+            v1Status[key] = str(status[key])
+    if status.get('err') is not None:
+        # the codes differ, errors v1 does not know are named by _mapV2Status
+        v1Status['err'] = _V2_TO_V1_ERRORS.get(status['err'])
+    if status.get('acs') is not None:
+        v1Status['ast'] = str(status['acs'])
+    if 'alw' in status:
+        v1Status['alw'] = _flag(status['alw'])
+    if 'adi' in status:
+        v1Status['adi'] = _flag(status['adi'])
+    if 'wen' in status:
+        v1Status['wen'] = _flag(status['wen'])
+    if status.get('pha') is not None:
+        # v2: [L1, L2, L3 before the contactor, L1, L2, L3 after the contactor]
+        bits = (0x08, 0x10, 0x20, 0x01, 0x02, 0x04)
+        v1Status['pha'] = sum(bit for bit, on in zip(bits, status['pha']) if on)
+    if status.get('tma') is not None:
+        v1Status['tma'] = status['tma']
+    if status.get('wh') is not None:
+        # v1 counts deka-watt-seconds
+        v1Status['dws'] = round(status['wh'] * 360)
+    if 'dwo' in status:
+        # v2 uses Wh and null for no limit, v1 0.1 kWh and 0
+        v1Status['dwo'] = round(status['dwo'] / 100) if status['dwo'] else 0
+    if 'trx' in status:
+        v1Status['uby'] = status['trx'] or 0
+    if status.get('eto') is not None:
+        v1Status['eto'] = round(status['eto'] / 100)
+    if status.get('nrg') is not None and len(status['nrg']) >= 16:
+        # v2 reports A and W, v1 0.1 A, 0.1 kW per phase and 0.01 kW in total
+        nrg = status['nrg']
+        v1Status['nrg'] = (
+            [round(u) for u in nrg[0:4]]
+            + [round(i * 10) for i in nrg[4:7]]
+            + [round(p / 100) for p in nrg[7:11]]
+            + [round(nrg[11] / 10)]
+            + [round(lf) for lf in nrg[12:16]]
+        )
+    if status.get('fwv') is not None:
+        v1Status['fwv'] = status['fwv']
+    if status.get('sse') is not None:
+        v1Status['sse'] = status['sse']
+    if isinstance(status.get('ccw'), dict) and 'ssid' in status['ccw']:
+        v1Status['wss'] = status['ccw']['ssid']
+    if status.get('tof') is not None:
+        # v2 uses minutes, v1 hours + 100
+        v1Status['tof'] = status['tof'] // 60 + 100
+    return v1Status
+
+
+def _writtenStatus(parameters):
+    """The mapped status values of written v1 parameters."""
+    status = {}
+    for parameter, value in parameters.items():
+        key, mapValue = _WRITTEN_STATUS[parameter]
+        status[key] = mapValue(value)
+    return status
+
+
+def _mapV2Status(status, v1Status):
+    mappedStatus = GoeChargerStatusMapper().mapApiStatusResponse(v1Status)
+    if status.get('err') is not None and status['err'] not in _V2_TO_V1_ERRORS:
+        mappedStatus['charger_err'] = _V2_ERRORS.get(status['err'], 'UNKNOWN')
+    return mappedStatus
+
+
+def mapV2Status(status):
+    """Map a partial v2 status, e.g. a single pushed value.
+
+    Only the status keys whose v2 keys are all contained in status are returned.
+    """
+    v1Status = _v2ToV1Status(status)
+    # values that could not be converted, e.g. an incomplete nrg array, are not returned
+    convertedKeys = {apiKey for apiKey in status if _V1_KEYS.get(apiKey, apiKey) in v1Status}
+    mappedStatus = _mapV2Status(status, v1Status)
+    return {
+        key: value for key, value in mappedStatus.items()
+        if _V2_STATUS_KEYS[key] and all(apiKey in convertedKeys for apiKey in _V2_STATUS_KEYS[key])
+    }
+
+
+class GoeChargerApi:
+    """Async replacement for goecharger.GoeCharger.
+
+    Uses the shared aiohttp session of Home Assistant, so connections to a charger are
+    kept alive and reused between polls instead of blocking an executor thread per request.
+    The returned status dicts are mapped by the goecharger library and have the same shape
+    as the ones returned by GoeCharger.requestStatus.
+
+    Chargers which offer the v2 api are asked for the requested keys only, see requestStatus.
+    The requests go to the charger one at a time, parameter changes ahead of status polls,
+    see RequestScheduler.
+    """
+
+    CableLockMode = GoeCharger.CableLockMode
+
+    def __init__(self, hass, host, session=None, requestTimeout=REQUEST_TIMEOUT):
+        if host is None or host == '':
+            raise ValueError("host must be specified")
+        self.host = host
+        self.requestTimeout = requestTimeout
+        self.apiVersion = None
+        # the detection found the charger unreachable, it is only tried again once the charger answers
+        self._detectionFailed = False
+        self._session = session if session is not None else async_get_clientsession(hass)
+        self.metrics = ChargerMetrics()
+        # users of the client in the client registry, see async_get_client
+        self.users = 0
+        # requests on their way to the charger, and the most there have been at once
+        self.inFlight = 0
+        self.maxInFlight = 0
+        self._scheduler = RequestScheduler(self.metrics)
+
+    async def _queryJson(self, path, timeout):
+        if path.startswith(('/mqtt', '/api/set')):
+            return await self._scheduler.run(
+                lambda: self._fetchJson(path, timeout, self.metrics.set), PRIORITY_COMMAND
+            )
+        # identical status requests return the same status, so a queued one answers them all
+        return await self._scheduler.run(
+            lambda: self._fetchJson(path, timeout, self.metrics.status), PRIORITY_POLL, mergeKey=path
+        )
+
+    async def _fetchJson(self, path, timeout, requestMetrics):
+        start = time.perf_counter()
+        self.inFlight += 1
+        self.maxInFlight = max(self.maxInFlight, self.inFlight)
+        try:
+            async with self._session.get(
+                f"http://{self.host}{path}", timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                response.raise_for_status()
+                body = await response.read()
+            received = time.perf_counter()
+            # the charger does not always send a json content-type
+            result = json.loads(body)
+        except asyncio.TimeoutError:
+            requestMetrics.recordError(timeout=True)
+            raise
+        except (aiohttp.ClientError, ValueError):
+            requestMetrics.recordError()
+            raise
+        finally:
+            self.inFlight -= 1
+        requestMetrics.recordResponse(received - start, len(body), time.perf_counter() - received)
+        return result
+
+    async def _setParameter(self, parameter, value):
+        """Write a v1 parameter, returns a SetResult."""
+        response = await self._queryJson(f"/mqtt?payload={parameter}={value}", SET_TIMEOUT)
+        # v1 chargers answer with their status after the change
+        if isinstance(response, dict) and 'car' in response:
+            return SetResult(GoeChargerStatusMapper().mapApiStatusResponse(response), True)
+        return SetResult(_writtenStatus({parameter: value}), False)
+
+    async def detectApiVersion(self, timeout=None):
+        """Check whether the charger offers the filtered v2 status, stays undetected if it is unreachable."""
+        try:
+            status = await self._queryJson("/api/status?filter=sse", timeout or self.requestTimeout)
+            self.apiVersion = API_V2 if isinstance(status, dict) and 'sse' in status else API_V1
+        except (aiohttp.ClientResponseError, ValueError):
+            # v1 chargers do not know /api/status, or answer it with something else than json
+            self.apiVersion = API_V1
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            _LOGGER.debug(f"api detection for '{self.host}' failed: {e!r}")
+            return
+        _LOGGER.debug(f"charger '{self.host}' uses api v{self.apiVersion}")
+
+    async def requestStatus(self, keys=None, timeout=None):
+        """Fetch and map the status, an empty dict if the charger did not answer with a status.
+
+        A charger which answers may still have the car_status 'unknown', e.g. a v2 charger in an error state.
+        With keys only these status keys (and car_status) are requested from v2 chargers and returned.
+        v1 chargers always return the full status.
+        Every request gets timeout seconds, by default the requestTimeout of the client.
+
+        An unreachable charger is not detected again with every poll, it only gets the v1 status
+        request until it answers.
+        """
+        timeout = timeout or self.requestTimeout
+        if self.apiVersion is None and not self._detectionFailed:
+            await self.detectApiVersion(timeout)
+            if self.apiVersion is None:
+                # unreachable, the status request would fail the same way
+                self._detectionFailed = True
+                return {}
+        if self.apiVersion == API_V2:
+            return await self._requestStatusV2(keys, timeout)
+
+        try:
+            status = await self._queryJson("/status", timeout)
+        except (aiohttp.ClientResponseError, ValueError) as e:
+            # the charger answers, but not with a v1 status, it is detected with the next poll
+            self._detectionFailed = False
+            _LOGGER.debug(f"status request to '{self.host}' failed: {e!r}")
+            return {}
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            _LOGGER.debug(f"status request to '{self.host}' failed: {e!r}")
+            return {}
+        # a charger which answers is detected with the next poll
+        self._detectionFailed = False
+        if not isinstance(status, dict) or not status:
+            return {}
+        return GoeChargerStatusMapper().mapApiStatusResponse(status)
+
+    async def _requestStatusV2(self, keys, timeout):
+        statusKeys = set(_V2_STATUS_KEYS) if keys is None else set(keys) | {'car_status'}
+        apiKeys = sorted({apiKey for key in statusKeys for apiKey in _V2_STATUS_KEYS.get(key, ())})
+        try:
+            status = await self._queryJson(f"/api/status?filter={','.join(apiKeys)}", timeout)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            _LOGGER.debug(f"status request to '{self.host}' failed: {e!r}")
+            return {}
+        if not isinstance(status, dict) or not status:
+            return {}
+        mappedStatus = _mapV2Status(status, _v2ToV1Status(status))
+        return {key: value for key, value in mappedStatus.items() if key in statusKeys}
+
+    async def setParameters(self, maxCurrent=None, absoluteMaxCurrent=None, chargeLimit=None, cableLockMode=None):
+        """Set several parameters with the fewest requests possible.
+
+        v2 chargers get all parameters with one request, v1 chargers need one request per parameter.
+        Returns a SetResult, confirmed with the status of the last v1 request.
+        """
+        parameters = {}
+        if maxCurrent is not None:
+            parameters['amx'] = str(min(max(maxCurrent, 6), 32))
+        if absoluteMaxCurrent is not None:
+            parameters['ama'] = str(min(max(absoluteMaxCurrent, 6), 32))
+        if chargeLimit is not None:
+            parameters['dwo'] = str(int(chargeLimit * 10) if chargeLimit >= 0 else 0)
+        if cableLockMode is not None:
+            if not isinstance(cableLockMode, GoeCharger.CableLockMode):
+                raise ValueError(f"Invalid CableLockMode: {cableLockMode} provided")
+            parameters['ust'] = str(cableLockMode.value)
+        if not parameters:
+            return SetResult({}, False)
+
+        if self.apiVersion == API_V2:
+            query = '&'.join(f"{_V2_SET_KEYS[parameter]}={self._v2SetValue(parameter, value)}"
+                             for parameter, value in parameters.items())
+            await self._queryJson(f"/api/set?{query}", SET_TIMEOUT)
+            return SetResult(_writtenStatus(parameters), False)
+
+        result = SetResult({}, False)
+        for parameter, value in parameters.items():
+            result = await self._setParameter(parameter, value)
+        if result.confirmed:
+            return result
+        return SetResult(_writtenStatus(parameters), False)
+
+    @staticmethod
+    def _v2SetValue(parameter, value):
+        if parameter == 'dwo':
+            # v2 uses Wh and null for no limit, v1 0.1 kWh and 0
+            return int(value) * 100 if int(value) > 0 else 'null'
+        return value
+
+    async def setTmpMaxCurrent(self, current):
+        current = min(max(current, 6), 32)
+        return await self._setParameter('amx', str(current))
+
+    async def setAbsoluteMaxCurrent(self, maxCurrent):
+        maxCurrent = min(max(maxCurrent, 6), 32)
+        return await self._setParameter('ama', str(maxCurrent))
+
+    async def setAllowCharging(self, allow):
+        return await self._setParameter('alw', '1' if allow else '0')
+
+    async def setChargeLimit(self, chargeLimit):
+        limit = int(chargeLimit * 10) if chargeLimit >= 0 else 0
+        return await self._setParameter('dwo', str(limit))
+
+    async def setCableLockMode(self, cableLockMode):
+        """Set the cable lock mode, a CableLockMode or its value like the cable_lock_mode of the status."""
+        try:
+            cableLockMode = GoeCharger.CableLockMode(cableLockMode)
+        except ValueError:
+            raise ValueError(f"Invalid CableLockMode: {cableLockMode} provided")
+        return await self._setParameter('ust', str(cableLockMode.value))
+
+
+def _hostKey(host):
+    return host.strip().lower().removeprefix('http://').rstrip('/').removesuffix(':80')
+
+
+@callback
+def async_get_client(hass, host):
+    """The client of the charger at host, shared by the coordinator, the entities and the services.
+
+    Every call has to be paired with async_release_client.
+    """
+    clients = hass.data[DOMAIN]["clients"]
+    key = _hostKey(host)
+    client = clients.get(key)
+    if client is None:
+        client = clients[key] = GoeChargerApi(
+            hass, host, requestTimeout=hass.data[DOMAIN]["request_timeout"].total_seconds()
+        )
+    client.users += 1
+    return client
+
+
+@callback
+def async_release_client(hass, client):
+    client.users -= 1
+    if client.users <= 0:
+        hass.data[DOMAIN]["clients"].pop(_hostKey(client.host), None)
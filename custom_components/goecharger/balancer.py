@@ -0,0 +1,212 @@
+"""Dynamic load balancing of the max current between chargers."""
+import asyncio
+import logging
+
+import aiohttp
+from homeassistant.core import callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+
+from .allocation import PHASES, ChargerDemand, allocateCurrents
+from .const import DOMAIN
+from .polling import CAR_STATUS_CHARGING, CAR_STATUS_NO_CAR
+from .writer import async_get_writer
+
+_LOGGER = logging.getLogger(__name__)
+
+# status keys the balancer reads, fetched even if the entities of these are disabled
+BALANCER_KEYS = (
+    'car_status',
+    'allow_charging',
+    'cable_max_current',
+    'charger_absolute_max_current',
+    'charger_max_current',
+    'i_l1', 'i_l2', 'i_l3',
+)
+PHASE_CURRENT_KEYS = ('i_l1', 'i_l2', 'i_l3')
+
+# current of a phase above which the car is considered to draw from it
+PHASE_IN_USE_CURRENT = 1.0
+
+# updates of several chargers within this delay are balanced together
+BALANCE_DELAY = 0.5
+
+STORAGE_VERSION = 1
+# seconds the saving of the paused chargers is delayed, pauses of several chargers are saved together
+SAVE_DELAY = 1
+
+
+def chargerDemand(chargerName, data):
+    """Demand of a charger from its coordinator data, None if no car is connected."""
+    if data.get('car_status') in (None, 'unknown', CAR_STATUS_NO_CAR):
+        return None
+    maxCurrent = data.get('charger_absolute_max_current') or 32
+    if data.get('cable_max_current'):
+        maxCurrent = min(maxCurrent, data['cable_max_current'])
+    charging = data['car_status'] == CAR_STATUS_CHARGING
+    phases = tuple(
+        phase for phase, key in zip(PHASES, PHASE_CURRENT_KEYS) if (data.get(key) or 0) > PHASE_IN_USE_CURRENT
+    )
+    if not charging or not phases:
+        # a car which does not draw current yet may start on all phases
+        phases = PHASES
+    return ChargerDemand(chargerName, maxCurrent, phases, charging)
+
+
+class LoadBalancer:
+    """Shares the site limit between the chargers with a connected car.
+
+    Runs after every coordinator update and only writes the max current of chargers whose
+    allocation changed. Chargers for which not even the minimum current is left are paused
+    and resumed by the balancer, chargers switched off by the user are left alone.
+
+    The paused chargers are saved, so a charger paused before a restart is still resumed after it.
+    """
+
+    def __init__(self, hass, phaseLimits, minCurrent, chargerNames=None):
+        self._hass = hass
+        self._phaseLimits = phaseLimits
+        self._minCurrent = minCurrent
+        self._chargerNames = set(chargerNames) if chargerNames else None
+        self._removeListeners = {}
+        self._cancelBalance = None
+        self._paused = set()
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.balancer")
+        self.allocation = {}
+        self.runs = 0
+
+    async def async_restore(self):
+        """Load the chargers paused before the restart, call before the chargers are started."""
+        try:
+            stored = await self._store.async_load()
+        except (HomeAssistantError, ValueError) as e:
+            _LOGGER.warning(f"Unable to load the chargers paused by the load balancer: {e!r}")
+            return
+        if stored:
+            self._paused.update(stored["paused"])
+            _LOGGER.debug(f"chargers paused by the load balancer: {sorted(self._paused)}")
+
+    @callback
+    def _async_save(self):
+        self._store.async_delay_save(lambda: {"paused": sorted(self._paused)}, SAVE_DELAY)
+
+    def _balanced(self, chargerName):
+        return self._chargerNames is None or chargerName in self._chargerNames
+
+    @callback
+    def async_add_charger(self, chargerName, coordinator):
+        if not self._balanced(chargerName) or chargerName in self._removeListeners:
+            return
+        for key in BALANCER_KEYS:
+            coordinator.addNeededKey(key)
+        removeUpdateListener = coordinator.async_add_listener(self._async_schedule)
+
+        @callback
+        def removeListener():
+            removeUpdateListener()
+            for key in BALANCER_KEYS:
+                coordinator.removeNeededKey(key)
+
+        self._removeListeners[chargerName] = removeListener
+
+    @callback
+    def async_remove_charger(self, chargerName):
+        removeListener = self._removeListeners.pop(chargerName, None)
+        if removeListener is not None:
+            removeListener()
+        # a paused charger stays paused, it is resumed once it is added again, e.g. after reloading its entry
+        self.allocation.pop(chargerName, None)
+
+    @callback
+    def async_stop(self):
+        for chargerName in list(self._removeListeners):
+            self.async_remove_charger(chargerName)
+        if self._cancelBalance is not None:
+            self._cancelBalance()
+            self._cancelBalance = None
+
+    @callback
+    def _async_schedule(self):
+        if self._cancelBalance is None:
+            self._cancelBalance = async_call_later(self._hass, BALANCE_DELAY, self._async_balance)
+
+    def _demands(self):
+        """Demands of the reachable chargers and the phase limits left by the unreachable ones."""
+        phaseLimits = list(self._phaseLimits)
+        demands = []
+        for chargerName in self._removeListeners:
+            coordinator = self._hass.data[DOMAIN]["coordinators"][chargerName]
+            if not coordinator.data:
+                continue
+            if not coordinator.last_update_success or coordinator.stale:
+                # keep the last known current of a charger which can not be controlled right now
+                demand = chargerDemand(chargerName, coordinator.data)
+                if demand is not None:
+                    for phase in demand.phases:
+                        phaseLimits[phase] -= coordinator.data.get('charger_max_current', demand.maxCurrent)
+                continue
+            if (
+                coordinator.data.get('allow_charging') == 'off'
+                and chargerName not in self._paused
+            ):
+                continue
+            demand = chargerDemand(chargerName, coordinator.data)
+            if demand is not None:
+                demands.append(demand)
+        return demands, [max(limit, 0) for limit in phaseLimits]
+
+    async def _async_balance(self, _now):
+        self._cancelBalance = None
+        demands, phaseLimits = self._demands()
+        allocation = allocateCurrents(demands, phaseLimits, self._minCurrent)
+        self.allocation = allocation
+        self.runs += 1
+        _LOGGER.debug(f"load balancing with {phaseLimits} A: {allocation}")
+        # pauses and lower currents first, so the site limit is not exceeded while other chargers are raised
+        lowered = {
+            chargerName: current for chargerName, current in allocation.items() if self._lowers(chargerName, current)
+        }
+        results = await asyncio.gather(*(
+            self._async_apply(chargerName, current) for chargerName, current in lowered.items()
+        ))
+        if not all(results):
+            _LOGGER.warning("not raising the current of any charger, a charger could not be lowered")
+            return
+        await asyncio.gather(*(
+            self._async_apply(chargerName, current)
+            for chargerName, current in allocation.items() if chargerName not in lowered
+        ))
+
+    def _lowers(self, chargerName, current):
+        """Whether current lowers the draw of a charger, a paused charger is only raised by its allocation."""
+        if current == 0:
+            return True
+        if chargerName in self._paused:
+            return False
+        data = self._hass.data[DOMAIN]["coordinators"][chargerName].data or {}
+        return current < (data.get('charger_max_current') or 0)
+
+    async def _async_apply(self, chargerName, current):
+        """Apply the allocated current to a charger, returns whether it is in effect."""
+        api = self._hass.data[DOMAIN]["api"][chargerName]
+        coordinator = self._hass.data[DOMAIN]["coordinators"][chargerName]
+        try:
+            if current == 0:
+                if chargerName not in self._paused:
+                    _LOGGER.info(f"pausing charger '{chargerName}', the site limit is reached")
+                    self._paused.add(chargerName)
+                    self._async_save()
+                    coordinator.async_apply_set_result(await api.setAllowCharging(False))
+                return True
+            # not coalesced, the charger is only resumed once the lower current was written
+            await async_get_writer(self._hass, chargerName, 'max_current').async_write_now(current)
+            if chargerName in self._paused:
+                _LOGGER.info(f"resuming charger '{chargerName}'")
+                coordinator.async_apply_set_result(await api.setAllowCharging(True))
+                self._paused.discard(chargerName)
+                self._async_save()
+            return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            _LOGGER.error(f"Unable to balance Charger {chargerName}: {e!r}")
+            return False
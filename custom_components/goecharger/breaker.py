@@ -0,0 +1,45 @@
+"""Circuit breaker for chargers which do not answer."""
+import random
+
+# consecutive failures after which the breaker opens
+FAILURE_THRESHOLD = 3
+BACKOFF_BASE = 30
+BACKOFF_MAX = 600
+
+
+class CircuitBreaker:
+    """Counts the consecutive failures of a charger and backs off once it looks dead.
+
+    After threshold failures in a row the breaker opens. The delay until the next attempt
+    doubles with every further failure up to maxDelay and is jittered, so many dead chargers
+    are not retried at the same moment. The first success closes the breaker.
+    """
+
+    def __init__(self, threshold=FAILURE_THRESHOLD, baseDelay=BACKOFF_BASE, maxDelay=BACKOFF_MAX, rng=random):
+        self._threshold = threshold
+        self._baseDelay = baseDelay
+        self._maxDelay = maxDelay
+        self._rng = rng
+        self.failures = 0
+        self.retryDelay = None
+
+    @property
+    def isOpen(self):
+        return self.failures >= self._threshold
+
+    def recordFailure(self):
+        """Count a failure, returns the seconds until the next attempt if the breaker is open."""
+        self.failures += 1
+        if not self.isOpen:
+            return None
+        delay = min(self._baseDelay * 2 ** (self.failures - self._threshold), self._maxDelay)
+        # equal jitter: at least half the delay, so the backoff still grows
+        self.retryDelay = delay / 2 + self._rng.uniform(0, delay / 2)
+        return self.retryDelay
+
+    def recordSuccess(self):
+        """Close the breaker, returns whether it was open."""
+        wasOpen = self.isOpen
+        self.failures = 0
+        self.retryDelay = None
+        return wasOpen
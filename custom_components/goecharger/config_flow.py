@@ -6,7 +6,7 @@ from homeassistant import config_entries
 from homeassistant.core import callback
 
 from homeassistant.const import CONF_HOST, CONF_SCAN_INTERVAL
-from .const import DOMAIN, CONF_NAME, CONF_CORRECTION_FACTOR
+from .const import DOMAIN, CONF_NAME, CONF_CORRECTION_FACTOR, CONF_MQTT_TOPIC
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -39,6 +39,7 @@ class ConfigFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                     vol.Required(
                         CONF_CORRECTION_FACTOR, default="1.0"
                     ): str,
+                    vol.Optional(CONF_MQTT_TOPIC): str,
                 }
             ),
         )
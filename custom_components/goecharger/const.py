@@ -3,4 +3,17 @@ CONF_NAME = "name"
 CONF_SERIAL = "serial"
 CONF_CHARGERS = "chargers"
 CONF_CORRECTION_FACTOR = "correction_factor"
-CHARGER_API = "charger_api"
+CONF_MAX_PARALLEL_REQUESTS = "max_parallel_requests"
+CONF_REQUEST_TIMEOUT = "request_timeout"
+CONF_FAST_SCAN_INTERVAL = "fast_scan_interval"
+CONF_STATIC_SCAN_INTERVAL = "static_scan_interval"
+CONF_MQTT_TOPIC = "mqtt_topic"
+CONF_PUSH_FALLBACK_INTERVAL = "push_fallback_interval"
+CONF_IDLE_SCAN_INTERVAL = "idle_scan_interval"
+CONF_NO_CAR_SCAN_INTERVAL = "no_car_scan_interval"
+CONF_WRITE_COALESCE_WINDOW = "write_coalesce_window"
+CONF_LOAD_BALANCING = "load_balancing"
+CONF_SITE_LIMIT = "site_limit"
+CONF_PHASE_LIMITS = "phase_limits"
+CONF_MIN_CURRENT = "min_current"
+CONF_TELEMETRY_INTERVAL = "telemetry_interval"
@@ -0,0 +1,382 @@
+"""Update coordination for the go-eCharger integration."""
+import asyncio
+import logging
+import random
+import time
+from collections import Counter
+from datetime import timedelta
+
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_call_at, async_call_later
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .api import API_V2, async_release_client
+from .breaker import CircuitBreaker
+from .const import DOMAIN
+from .polling import TIER_FAST, TIERS, PollTiers, nextPollSlot, pollPhase, tierOf
+from .sessions import SessionTracker
+from .store import ChargerStateStore
+from .telemetry import ChargerTelemetry
+from .writer import async_remove_writers
+
+_LOGGER = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# requested with every poll, so the filtered status of a v2 charger is never empty
+REQUIRED_KEYS = frozenset(['car_status'])
+
+# seconds a charger with open circuit breaker gets to answer the probe
+PROBE_TIMEOUT = 3
+
+# chargers added within this many seconds are started together, e.g. the chargers of many config entries
+START_BATCH_WINDOW = 0.2
+
+# seconds after a write whose values the charger did not confirm until they are confirmed by a poll
+CONFIRM_DELAY = 2
+
+# seconds after a fetch in which a refresh takes over its result, unless values are due which it did not fetch
+REFRESH_MERGE_WINDOW = 1
+
+# a poll starts up to this fraction of the interval, at most MAX_POLL_JITTER seconds, after its slot
+POLL_JITTER = 0.05
+MAX_POLL_JITTER = 0.5
+
+
+class GoeChargerCoordinator(DataUpdateCoordinator):
+    """Coordinator of a single charger.
+
+    Keeps track of the status keys that changed with the last update, so entities only
+    write their state when their value changed. The data dict of an update is never
+    modified in place, it is replaced by a new dict with the next update.
+
+    The charger is polled in its own slots, offset by pollPhase within the interval, so
+    the chargers of a fleet are not all polled at the same moment.
+    """
+
+    def __init__(self, hass, logger, *, pollTiers, pollPhase=0.0, **kwargs):
+        super().__init__(hass, logger, update_interval=pollTiers.updateInterval, **kwargs)
+        self.pollTiers = pollTiers
+        self.pollPhase = pollPhase
+        self._keyUsers = Counter()
+        self._previousData = None
+        self.changedKeys = None
+        # whether data are last known values, restored after a restart or kept while the charger does not answer
+        self.stale = False
+        # monotonic time of the last poll or push which updated the data, restored data is dated back to its fetch
+        self.updated = None
+        # polls and pushes which brought new electrical values, written settings taken over from set calls do not count
+        self.measurements = 0
+        # circuit breaker of the fetcher, for diagnostics and the schedule of the polls
+        self.breaker = None
+        self.stateWrites = 0
+        self.skippedStateWrites = 0
+        self._cancelConfirmation = None
+
+    @callback
+    def async_update_listeners(self):
+        previousData = self._previousData
+        if previousData is None or self.data is None:
+            self.changedKeys = None
+        else:
+            self.changedKeys = {
+                key for key, value in self.data.items() if previousData.get(key, _MISSING) != value
+            }
+        self._previousData = self.data
+        super().async_update_listeners()
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(
+                f"{self.name}: {len(self.changedKeys) if self.changedKeys is not None else 'all'} values changed, "
+                f"{self.stateWrites} state writes, {self.skippedStateWrites} skipped"
+            )
+
+    @property
+    def outdated(self):
+        """Whether the data is stale for longer than the stale limit of the poll tiers."""
+        return (
+            self.stale and self.updated is not None
+            and time.monotonic() - self.updated > self.pollTiers.staleLimit
+        )
+
+    @callback
+    def async_set_updated_data(self, data):
+        self.stale = False
+        super().async_set_updated_data(data)
+
+    @callback
+    def _schedule_refresh(self):
+        """Schedule the next poll in the next slot of the charger, replaces the schedule of DataUpdateCoordinator.
+
+        DataUpdateCoordinator polls one interval after the last poll started on a whole second, so
+        chargers started together stay in step and every poll delays the following ones.
+        While the circuit breaker is open the charger is probed after the full retry delay instead,
+        the slots would shorten the delay the breaker handed out.
+
+        Only _unsub_refresh, _async_unsub_refresh and _handle_refresh_interval of DataUpdateCoordinator
+        are used, they are the same from Home Assistant 2024.1 up to 2025.1.
+        """
+        if self.update_interval is None:
+            return
+        if self.config_entry and self.config_entry.pref_disable_polling:
+            return
+        self._async_unsub_refresh()
+        interval = self.update_interval.total_seconds()
+        now = self.hass.loop.time()
+        if self.breaker is not None and self.breaker.isOpen:
+            nextPoll = now + interval
+        else:
+            nextPoll = nextPollSlot(now, interval, self.pollPhase)
+            nextPoll += random.uniform(0, min(interval * POLL_JITTER, MAX_POLL_JITTER))
+        self._unsub_refresh = async_call_at(self.hass, self._handle_refresh_interval, nextPoll)
+
+    @callback
+    def async_apply_set_result(self, result):
+        """Take over the status a set call returned, instead of polling the charger again.
+
+        Written values the charger did not confirm are shown right away and confirmed by a poll
+        CONFIRM_DELAY seconds later.
+        """
+        self.boostPolling()
+        tiers = frozenset(tierOf(key) for key in result.status)
+        if result.confirmed:
+            self.pollTiers.markFetched(tiers, time.monotonic())
+            self.async_set_updated_data(PollTiers.merge(self.data, result.status, tiers))
+            return
+        # the entities need a complete status, the written values alone are not one
+        if self.data is not None and result.status:
+            self.async_set_updated_data(PollTiers.merge(self.data, result.status, tiers))
+        if self._cancelConfirmation is None:
+            self._cancelConfirmation = async_call_later(self.hass, CONFIRM_DELAY, self._async_confirm)
+
+    async def _async_confirm(self, _now):
+        self._cancelConfirmation = None
+        self.pollTiers.requestFullUpdate()
+        await self.async_refresh()
+
+    @callback
+    def async_cancel_confirmation(self):
+        if self._cancelConfirmation is not None:
+            self._cancelConfirmation()
+            self._cancelConfirmation = None
+
+    def boostPolling(self):
+        """Poll with the fastest intervals for a while, e.g. after a setting was changed."""
+        self.pollTiers.boost(time.monotonic())
+        self.update_interval = self.pollTiers.updateInterval
+
+    @property
+    def neededKeys(self):
+        """Status keys used by the added entities, None as long as no entity was added."""
+        if not self._keyUsers:
+            return None
+        return set(self._keyUsers) | REQUIRED_KEYS
+
+    def addNeededKey(self, key):
+        if key not in self._keyUsers:
+            # fetch the new key with the next poll
+            self.pollTiers.requestFullUpdate()
+        self._keyUsers[key] += 1
+
+    def removeNeededKey(self, key):
+        self._keyUsers[key] -= 1
+        if self._keyUsers[key] <= 0:
+            del self._keyUsers[key]
+
+    def hasChanged(self, key):
+        """Return whether the value of key changed with the last update."""
+        return self.changedKeys is None or key in self.changedKeys
+
+
+class ChargerStateFetcher:
+    """Fetches the state of a single charger.
+
+    All fetchers share one semaphore, so the number of chargers polled at the same time
+    stays limited even though every charger has its own coordinator and schedule.
+
+    If the charger does not answer, the last known values are kept and marked stale. Once
+    the circuit breaker opened, the charger only gets a short probe now and then, so dead
+    chargers do not hold the slots of the semaphore which the others need.
+
+    There is at most one fetch per charger in flight. Refreshes which overlap it, e.g. a
+    scheduled poll and the confirmation of a write, get its result instead of fetching again.
+    """
+
+    def __init__(self, chargerName, goeCharger, semaphore):
+        self._chargerName = chargerName
+        self._goeCharger = goeCharger
+        self._semaphore = semaphore
+        self.breaker = CircuitBreaker()
+        self._inFlight = None
+        self._lastSuccess = None
+
+    async def _async_request(self, keys, timeout=None):
+        """Status of the charger, the requests time out after timeout seconds, by default after request_timeout."""
+        metrics = self._goeCharger.metrics
+        waitStart = time.perf_counter()
+        async with self._semaphore:
+            metrics.slotWait.add(time.perf_counter() - waitStart)
+            _LOGGER.debug(f"update for '{self._chargerName}'..")
+            return await self._goeCharger.requestStatus(keys, timeout)
+
+    def _failed(self):
+        """Keep the last known values of a charger which did not answer."""
+        wasOpen = self.breaker.isOpen
+        retryDelay = self.breaker.recordFailure()
+        if retryDelay is not None:
+            if not wasOpen:
+                _LOGGER.warning(
+                    f"Charger {self._chargerName} did not answer {self.breaker.failures} times, "
+                    f"keeping its last known values and retrying in {retryDelay:.0f} seconds"
+                )
+            self.coordinator.update_interval = timedelta(seconds=retryDelay)
+        if self.coordinator.data is None:
+            raise UpdateFailed(f"Unable to fetch state for Charger {self._chargerName}")
+        self.coordinator.stale = True
+        return self.coordinator.data
+
+    async def fetch_state(self):
+        metrics = self._goeCharger.metrics
+        if self._inFlight is not None:
+            metrics.joinedFetches += 1
+            # the fetch belongs to the refresh which started it, a joined refresh being cancelled must not cancel it
+            return await asyncio.shield(self._inFlight)
+        now = time.monotonic()
+        if (
+            self._lastSuccess is not None and now - self._lastSuccess < REFRESH_MERGE_WINDOW
+            and self.coordinator.data is not None and not self.coordinator.pollTiers.dueTiers(now)
+        ):
+            metrics.skippedFetches += 1
+            return self.coordinator.data
+        self._inFlight = asyncio.ensure_future(self._async_timed_fetch_state())
+        return await asyncio.shield(self._inFlight)
+
+    async def _async_timed_fetch_state(self):
+        start = time.perf_counter()
+        interval = self.coordinator.update_interval.total_seconds()
+        try:
+            return await self._async_fetch_state()
+        finally:
+            self._inFlight = None
+            self._goeCharger.metrics.recordUpdate(time.perf_counter() - start, interval)
+
+    async def _async_fetch_state(self):
+        fetchedStatus = None
+        if self.breaker.isOpen:
+            probeStatus = await self._async_request(REQUIRED_KEYS, PROBE_TIMEOUT)
+            if not probeStatus:
+                return self._failed()
+            if self._goeCharger.apiVersion != API_V2:
+                # v1 chargers answer the probe with their full status, there is nothing left to fetch
+                fetchedStatus = probeStatus
+
+        now = time.monotonic()
+        if fetchedStatus is not None:
+            tiers = TIERS
+        else:
+            tiers = self.coordinator.pollTiers.dueTiers(now)
+            keys = self.coordinator.neededKeys
+            if self.coordinator.data is None:
+                # the first poll fetches everything, so entities added later find their values
+                keys = None
+            elif keys is not None:
+                keys = {key for key in keys if key in REQUIRED_KEYS or tierOf(key) in tiers}
+            fetchedStatus = await self._async_request(keys)
+            if not fetchedStatus:
+                return self._failed()
+
+        if self.breaker.recordSuccess():
+            _LOGGER.info(f"Charger {self._chargerName} answers again")
+        self._lastSuccess = self.coordinator.updated = time.monotonic()
+        pollTiers = self.coordinator.pollTiers
+        pollTiers.markFetched(tiers, now)
+        if TIER_FAST in tiers:
+            self.coordinator.measurements += 1
+        self.coordinator.stale = False
+        data = PollTiers.merge(self.coordinator.data, fetchedStatus, tiers)
+        pollTiers.adaptTo(data.get('car_status'), now)
+        # the next poll is scheduled after the update with the adapted interval
+        self.coordinator.update_interval = pollTiers.updateInterval
+        return data
+
+
+def async_create_coordinator(hass, chargerName, goeCharger, pollTiers):
+    """Create the coordinator of one charger and register it together with its api."""
+    chargeStateFetcher = ChargerStateFetcher(chargerName, goeCharger, hass.data[DOMAIN]["semaphore"])
+    coordinator = GoeChargerCoordinator(
+        hass,
+        _LOGGER,
+        name=f"{DOMAIN}_{chargerName}",
+        update_method=chargeStateFetcher.fetch_state,
+        pollTiers=pollTiers,
+        pollPhase=pollPhase(chargerName),
+    )
+    chargeStateFetcher.coordinator = coordinator
+    coordinator.breaker = chargeStateFetcher.breaker
+    hass.data[DOMAIN]["api"][chargerName] = goeCharger
+    hass.data[DOMAIN]["coordinators"][chargerName] = coordinator
+    hass.data[DOMAIN]["stores"][chargerName] = ChargerStateStore(hass, chargerName, coordinator)
+    hass.data[DOMAIN]["sessions"][chargerName] = SessionTracker(hass, chargerName, coordinator)
+    hass.data[DOMAIN]["telemetry"][chargerName] = ChargerTelemetry(coordinator)
+    return coordinator
+
+
+def async_remove_coordinator(hass, chargerName):
+    if hass.data[DOMAIN].get("balancer") is not None:
+        hass.data[DOMAIN]["balancer"].async_remove_charger(chargerName)
+    async_remove_writers(hass, chargerName)
+    pushListener = hass.data[DOMAIN]["push"].pop(chargerName, None)
+    if pushListener is not None:
+        pushListener.async_stop()
+    store = hass.data[DOMAIN]["stores"].pop(chargerName, None)
+    if store is not None:
+        store.async_stop()
+    sessionTracker = hass.data[DOMAIN]["sessions"].pop(chargerName, None)
+    if sessionTracker is not None:
+        sessionTracker.async_stop()
+    telemetry = hass.data[DOMAIN]["telemetry"].pop(chargerName, None)
+    if telemetry is not None:
+        telemetry.async_stop()
+    goeCharger = hass.data[DOMAIN]["api"].pop(chargerName, None)
+    if goeCharger is not None:
+        async_release_client(hass, goeCharger)
+    coordinator = hass.data[DOMAIN]["coordinators"].pop(chargerName, None)
+    if coordinator is not None:
+        coordinator.async_cancel_confirmation()
+    hass.data[DOMAIN].get("metrics_summaries", {}).pop(chargerName, None)
+
+
+async def async_start_charger(hass, chargerName):
+    """Open the session history, restore the saved state of a charger and fetch the values which are due."""
+    coordinator = hass.data[DOMAIN]["coordinators"][chargerName]
+    await hass.data[DOMAIN]["sessions"][chargerName].async_start()
+    await hass.data[DOMAIN]["stores"][chargerName].async_restore()
+    if coordinator.pollTiers.dueTiers(time.monotonic()):
+        await coordinator.async_refresh()
+
+
+async def async_start_chargers(hass, chargerNames):
+    """Start the given chargers with one sweep, all of them at the same time."""
+    coordinators = hass.data[DOMAIN]["coordinators"]
+    await asyncio.gather(
+        *[async_start_charger(hass, chargerName) for chargerName in chargerNames if chargerName in coordinators]
+    )
+
+
+@callback
+def async_schedule_start(hass, chargerName):
+    """Start a charger together with the other chargers added within START_BATCH_WINDOW."""
+    pending = hass.data[DOMAIN]["pending_starts"]
+    pending.append(chargerName)
+    if len(pending) > 1:
+        return
+
+    @callback
+    def startBatch(_now):
+        chargerNames = list(pending)
+        pending.clear()
+        hass.async_create_background_task(
+            async_start_chargers(hass, chargerNames), f"{DOMAIN} start {len(chargerNames)} chargers"
+        )
+
+    async_call_later(hass, START_BATCH_WINDOW, startBatch)
+
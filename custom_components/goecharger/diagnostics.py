@@ -0,0 +1,39 @@
+"""Diagnostics of the go-eCharger integration."""
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_HOST
+
+from .const import DOMAIN, CONF_NAME
+from .metrics import summarize
+
+TO_REDACT = {CONF_HOST, "serial_number", "wifi_ssid", "unlocked_by_card"}
+
+
+async def async_get_config_entry_diagnostics(hass, entry):
+    """Request metrics and the last state of the charger of a config entry and the metrics of all chargers."""
+    chargerName = entry.data[CONF_NAME]
+    api = hass.data[DOMAIN]["api"].get(chargerName)
+    coordinator = hass.data[DOMAIN]["coordinators"].get(chargerName)
+
+    charger = {}
+    if api is not None:
+        charger["api_version"] = api.apiVersion
+        charger["metrics"] = api.metrics.summary()
+        charger["client_users"] = api.users
+        charger["max_in_flight"] = api.maxInFlight
+    if coordinator is not None:
+        charger["stale"] = coordinator.stale
+        charger["update_interval"] = coordinator.update_interval.total_seconds() if coordinator.update_interval else None
+        charger["consecutive_failures"] = coordinator.breaker.failures
+        charger["state_writes"] = coordinator.stateWrites
+        charger["skipped_state_writes"] = coordinator.skippedStateWrites
+        charger["data"] = async_redact_data(coordinator.data, TO_REDACT) if coordinator.data else None
+    charger["writers"] = {
+        parameter: {"writes": writer.writes, "suppressed_writes": writer.suppressedWrites}
+        for parameter, writer in hass.data[DOMAIN]["writers"].get(chargerName, {}).items()
+    }
+
+    return {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "charger": charger,
+        "fleet": summarize([client.metrics for client in hass.data[DOMAIN]["clients"].values()]),
+    }
@@ -0,0 +1,57 @@
+"""Base entity for the go-eCharger integration."""
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+
+class GoeChargerEntity(CoordinatorEntity):
+    """Entity of a charger that only writes its state when its value or availability changed.
+
+    While the charger does not answer, the entity keeps its last known value with the
+    attribute stale. Once the value is older than the stale limit of the poll tiers, the
+    entity is unavailable.
+    """
+
+    def __init__(self, coordinator, sourceAttribute):
+        super().__init__(coordinator)
+        self._sourceAttribute = sourceAttribute
+        self._writtenAvailable = None
+        self._writtenStale = None
+
+    @property
+    def available(self):
+        # entities are created before the first refresh, so there may be no value yet
+        data = self.coordinator.data
+        return (
+            super().available and data is not None and self._sourceAttribute in data
+            and not self.coordinator.outdated
+        )
+
+    @property
+    def extra_state_attributes(self):
+        if self.coordinator.stale:
+            return {"stale": True}
+        return None
+
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+        self.coordinator.addNeededKey(self._sourceAttribute)
+
+    async def async_will_remove_from_hass(self):
+        await super().async_will_remove_from_hass()
+        self.coordinator.removeNeededKey(self._sourceAttribute)
+
+    @callback
+    def _handle_coordinator_update(self):
+        available = self.available
+        stale = self.coordinator.stale
+        if (
+            available == self._writtenAvailable
+            and stale == self._writtenStale
+            and not self.coordinator.hasChanged(self._sourceAttribute)
+        ):
+            self.coordinator.skippedStateWrites += 1
+            return
+        self._writtenAvailable = available
+        self._writtenStale = stale
+        self.coordinator.stateWrites += 1
+        self.async_write_ha_state()
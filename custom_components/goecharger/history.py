@@ -0,0 +1,127 @@
+"""Charging session history of a charger in a memory-mapped ring file."""
+import bisect
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+# sessions kept per charger, several years with a few sessions a day
+RING_CAPACITY = 8192
+
+MAGIC = b'GOES'
+VERSION = 1
+# magic, version, record size, capacity, number of appended sessions
+_HEADER = struct.Struct('<4sHHIQ')
+# start and end (seconds since the epoch), energy (kWh), peak power (kW), card
+_RECORD = struct.Struct('<ddffI4x')
+# the header is followed by the session which is still open and then by the ring of sessions
+_OPEN_OFFSET = 32
+_RING_OFFSET = _OPEN_OFFSET + _RECORD.size
+
+Session = namedtuple('Session', ['start', 'end', 'energy', 'peakPower', 'card'])
+
+
+class _Field:
+    """Sequence of one field of the sessions in the ring, oldest first, for bisect."""
+
+    __slots__ = ('_ring', '_offset')
+
+    def __init__(self, ring, offset):
+        self._ring = ring
+        self._offset = offset
+
+    def __len__(self):
+        return len(self._ring)
+
+    def __getitem__(self, index):
+        return struct.unpack_from('<d', self._ring._mmap, self._ring._recordOffset(index) + self._offset)[0]
+
+
+class SessionRing:
+    """Fixed-size session records in a ring file, the oldest sessions are overwritten when it is full.
+
+    Sessions are appended in the order they end and do not overlap, so start and end times are
+    both sorted and serve as index: queries bisect the ring and only read the sessions in range.
+    The file is memory-mapped, opening and closing it does blocking I/O.
+    """
+
+    def __init__(self, path, capacity=RING_CAPACITY):
+        exists = os.path.exists(path) and os.path.getsize(path) >= _RING_OFFSET
+        self._file = open(path, 'r+b' if exists else 'w+b')
+        if exists:
+            # an existing file keeps its capacity
+            magic, version, recordSize, capacity, count = _HEADER.unpack(self._file.read(_HEADER.size))
+            if magic != MAGIC or version != VERSION or recordSize != _RECORD.size:
+                self._file.close()
+                raise ValueError(f"{path} is no session history of version {VERSION}")
+        else:
+            count = 0
+        self.capacity = capacity
+        self._count = count
+        # sparse file, unused records take no disk space
+        self._file.truncate(_RING_OFFSET + capacity * _RECORD.size)
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        if not exists:
+            self._writeHeader()
+
+    def _writeHeader(self):
+        _HEADER.pack_into(self._mmap, 0, MAGIC, VERSION, _RECORD.size, self.capacity, self._count)
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    def _recordOffset(self, index):
+        """Offset of the index-th session, oldest first."""
+        slot = (self._count - len(self) + index) % self.capacity
+        return _RING_OFFSET + slot * _RECORD.size
+
+    def __getitem__(self, index):
+        return Session(*_RECORD.unpack_from(self._mmap, self._recordOffset(index)))
+
+    def append(self, session):
+        _RECORD.pack_into(self._mmap, _RING_OFFSET + self._count % self.capacity * _RECORD.size, *session)
+        self._count += 1
+        self._writeHeader()
+
+    @property
+    def openSession(self):
+        """The session which did not end yet, kept in the file over restarts."""
+        session = Session(*_RECORD.unpack_from(self._mmap, _OPEN_OFFSET))
+        return session if session.start else None
+
+    @openSession.setter
+    def openSession(self, session):
+        _RECORD.pack_into(self._mmap, _OPEN_OFFSET, *(session or (0, 0, 0, 0, 0)))
+
+    def _records(self, first, last):
+        """Raw records of the sessions first to last, read as at most two contiguous chunks of the ring."""
+        if first >= last:
+            return
+        start = self._recordOffset(first)
+        end = self._recordOffset(last - 1) + _RECORD.size
+        view = memoryview(self._mmap)
+        try:
+            if start < end:
+                yield from _RECORD.iter_unpack(view[start:end])
+            else:
+                yield from _RECORD.iter_unpack(view[start:_RING_OFFSET + self.capacity * _RECORD.size])
+                yield from _RECORD.iter_unpack(view[_RING_OFFSET:end])
+        finally:
+            view.release()
+
+    def query(self, start=None, end=None, card=None):
+        """Sessions which overlap start to end (seconds since the epoch), oldest first."""
+        first = 0 if start is None else bisect.bisect_left(_Field(self, 8), start)
+        last = len(self) if end is None else bisect.bisect_right(_Field(self, 0), end)
+        records = self._records(first, last)
+        if card is None:
+            return [Session._make(record) for record in records]
+        return [Session._make(record) for record in records if record[4] == card]
+
+    def flush(self):
+        self._mmap.flush()
+
+    def close(self):
+        self.flush()
+        self._mmap.close()
+        self._file.close()
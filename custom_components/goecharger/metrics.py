@@ -0,0 +1,151 @@
+"""Request metrics of the go-eChargers, recorded into fixed-size buffers."""
+import bisect
+from array import array
+
+# number of recent values kept per metric
+RING_SIZE = 256
+
+# upper bounds of the latency histogram buckets in seconds, the last bucket counts everything above
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_KINDS = ('status', 'set')
+
+
+class RingBuffer:
+    """The last size values, recording is O(1) and never allocates."""
+
+    __slots__ = ('_values', '_size', '_next', 'count')
+
+    def __init__(self, size=RING_SIZE):
+        self._values = array('d', bytes(8 * size))
+        self._size = size
+        self._next = 0
+        self.count = 0
+
+    def add(self, value):
+        self._values[self._next] = value
+        self._next = (self._next + 1) % self._size
+        self.count += 1
+
+    def values(self):
+        return self._values[:min(self.count, self._size)]
+
+    def last(self):
+        return self._values[self._next - 1] if self.count else None
+
+
+def _summary(values):
+    """count, mean, p50, p95 and max of values, None for an empty sequence."""
+    if not values:
+        return None
+    values = sorted(values)
+    count = len(values)
+    return {
+        'count': count,
+        'mean': sum(values) / count,
+        'p50': values[count // 2],
+        'p95': values[min(int(count * 0.95), count - 1)],
+        'max': values[-1],
+    }
+
+
+class RequestMetrics:
+    """Metrics of one kind of request to a charger."""
+
+    __slots__ = ('requests', 'errors', 'timeouts', 'latency', 'latencyHistogram', 'size', 'parseTime')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.latency = RingBuffer()
+        self.latencyHistogram = array('L', bytes(array('L').itemsize * (len(LATENCY_BUCKETS) + 1)))
+        self.size = RingBuffer()
+        self.parseTime = RingBuffer()
+
+    def recordResponse(self, latency, size, parseTime):
+        self.requests += 1
+        self.latency.add(latency)
+        self.latencyHistogram[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+        self.size.add(size)
+        self.parseTime.add(parseTime)
+
+    def recordError(self, timeout=False):
+        self.requests += 1
+        if timeout:
+            self.timeouts += 1
+        else:
+            self.errors += 1
+
+
+class ChargerMetrics:
+    """Metrics of the requests to one charger and of the updates of its coordinator."""
+
+    __slots__ = (
+        'status', 'set', 'slotWait', 'queueWait', 'queueDepth', 'maxQueueDepth', 'mergedRequests',
+        'updateDuration', 'updates', 'overruns', 'joinedFetches', 'skippedFetches',
+    )
+
+    def __init__(self):
+        self.status = RequestMetrics()
+        self.set = RequestMetrics()
+        # time waited for one of the max_parallel_requests slots
+        self.slotWait = RingBuffer()
+        # time a request waited for the requests before it to the same charger, see RequestScheduler
+        self.queueWait = RingBuffer()
+        self.queueDepth = 0
+        self.maxQueueDepth = 0
+        # polls answered by an identical poll which was already queued
+        self.mergedRequests = 0
+        self.updateDuration = RingBuffer()
+        self.updates = 0
+        # updates which took longer than the update interval
+        self.overruns = 0
+        # refreshes which got the result of the fetch in flight or of one which just ended, see ChargerStateFetcher
+        self.joinedFetches = 0
+        self.skippedFetches = 0
+
+    def recordUpdate(self, duration, interval):
+        self.updates += 1
+        self.updateDuration.add(duration)
+        if duration > interval:
+            self.overruns += 1
+
+    def summary(self):
+        return summarize([self])
+
+
+def _histogram(counts):
+    labels = [f"<={bound * 1000:g}ms" for bound in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1] * 1000:g}ms"]
+    return dict(zip(labels, counts))
+
+
+def summarize(chargerMetrics):
+    """Summary of the metrics of one or several chargers, durations are in seconds."""
+    summary = {}
+    for kind in REQUEST_KINDS:
+        requestMetrics = [getattr(metrics, kind) for metrics in chargerMetrics]
+        summary[kind] = {
+            'requests': sum(metrics.requests for metrics in requestMetrics),
+            'errors': sum(metrics.errors for metrics in requestMetrics),
+            'timeouts': sum(metrics.timeouts for metrics in requestMetrics),
+            'latency': _summary([value for metrics in requestMetrics for value in metrics.latency.values()]),
+            'latency_histogram': _histogram(
+                [sum(counts) for counts in zip(*(metrics.latencyHistogram for metrics in requestMetrics))]
+            ),
+            'size': _summary([value for metrics in requestMetrics for value in metrics.size.values()]),
+            'parse_time': _summary([value for metrics in requestMetrics for value in metrics.parseTime.values()]),
+        }
+    summary['slot_wait'] = _summary([value for metrics in chargerMetrics for value in metrics.slotWait.values()])
+    summary['queue_wait'] = _summary([value for metrics in chargerMetrics for value in metrics.queueWait.values()])
+    summary['queue_depth'] = sum(metrics.queueDepth for metrics in chargerMetrics)
+    summary['max_queue_depth'] = max((metrics.maxQueueDepth for metrics in chargerMetrics), default=0)
+    summary['merged_requests'] = sum(metrics.mergedRequests for metrics in chargerMetrics)
+    summary['update_duration'] = _summary(
+        [value for metrics in chargerMetrics for value in metrics.updateDuration.values()]
+    )
+    summary['updates'] = sum(metrics.updates for metrics in chargerMetrics)
+    summary['overruns'] = sum(metrics.overruns for metrics in chargerMetrics)
+    summary['joined_fetches'] = sum(metrics.joinedFetches for metrics in chargerMetrics)
+    summary['skipped_fetches'] = sum(metrics.skippedFetches for metrics in chargerMetrics)
+    return summary
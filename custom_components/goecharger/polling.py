@@ -0,0 +1,154 @@
+"""Polling tiers for the status values of the go-eCharger."""
+import hashlib
+import math
+from datetime import timedelta
+
+from goecharger.goecharger import GoeCharger
+
+TIER_FAST = "fast"
+TIER_NORMAL = "normal"
+TIER_STATIC = "static"
+TIERS = frozenset([TIER_FAST, TIER_NORMAL, TIER_STATIC])
+
+# electrical values which are needed for load balancing
+FAST_KEYS = frozenset([
+    'u_l1', 'u_l2', 'u_l3', 'u_n',
+    'i_l1', 'i_l2', 'i_l3',
+    'p_l1', 'p_l2', 'p_l3', 'p_n', 'p_all',
+])
+
+# metadata which only changes with a firmware update or reconfiguration of the charger
+STATIC_KEYS = frozenset([
+    'firmware',
+    'serial_number',
+    'wifi_ssid',
+    'wifi_enabled',
+    'timezone_offset',
+    'timezone_dst_offset',
+])
+
+
+CAR_STATUS_NO_CAR = GoeCharger.GO_CAR_STATUS['1']
+CAR_STATUS_CHARGING = GoeCharger.GO_CAR_STATUS['2']
+
+# time the fastest intervals are used after a setting was changed
+BOOST_DURATION = timedelta(minutes=2)
+
+# slowest poll intervals after which values which were not updated are no longer shown
+STALE_LIMIT_INTERVALS = 3
+
+
+def pollPhase(chargerName):
+    """Offset of the poll slots of a charger as a fraction of its interval.
+
+    Derived from the name only, so it does not change when other chargers are added or removed,
+    and spread evenly over [0, 1) over many chargers.
+    """
+    digest = hashlib.blake2b(chargerName.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') / 2 ** 64
+
+
+def nextPollSlot(now, interval, phase):
+    """The first poll slot of a charger at least a quarter interval after now.
+
+    The slots are interval seconds apart and offset by phase * interval, so the polls keep their
+    exact interval however long they take. A poll which ends shortly before a slot skips it.
+    """
+    offset = phase * interval
+    return (math.floor((now + interval / 4 - offset) / interval) + 1) * interval + offset
+
+
+def tierOf(key):
+    if key in FAST_KEYS:
+        return TIER_FAST
+    if key in STATIC_KEYS:
+        return TIER_STATIC
+    return TIER_NORMAL
+
+
+class PollTiers:
+    """Decides which tiers of status values are taken over from a poll.
+
+    The coordinator polls with the interval of the fastest tier. Every poll is a single
+    request, the values of tiers that are not due yet are kept from the previous data.
+    So a fast tier does not add requests for the slower tiers, they ride along.
+
+    The fast and normal intervals adapt to the car status: they are used while charging,
+    idleInterval while a car is connected but not charging and noCarInterval without a car.
+    """
+
+    def __init__(self, fastInterval, normalInterval, staticInterval, idleInterval=None, noCarInterval=None):
+        self._chargingIntervals = (
+            min(fastInterval, normalInterval).total_seconds(),
+            normalInterval.total_seconds(),
+        )
+        self._idleInterval = max(idleInterval or normalInterval, normalInterval).total_seconds()
+        self._noCarInterval = max(noCarInterval or normalInterval, normalInterval).total_seconds()
+        self._intervals = {
+            TIER_FAST: self._chargingIntervals[0],
+            TIER_NORMAL: self._chargingIntervals[1],
+            TIER_STATIC: max(staticInterval, normalInterval).total_seconds(),
+        }
+        self._lastFetched = {}
+        self._boostedUntil = 0
+
+    @property
+    def updateInterval(self):
+        return timedelta(seconds=self._intervals[TIER_FAST])
+
+    @property
+    def staleLimit(self):
+        """Seconds after which values which were not updated are outdated, some of the slowest intervals."""
+        return STALE_LIMIT_INTERVALS * max(self._intervals[TIER_STATIC], self._idleInterval, self._noCarInterval)
+
+    def dueTiers(self, now):
+        # half a poll interval tolerance, so a tier does not slip a whole poll due to timer jitter
+        tolerance = self._intervals[TIER_FAST] / 2
+        return frozenset(
+            tier for tier, interval in self._intervals.items()
+            if tier not in self._lastFetched or now - self._lastFetched[tier] >= interval - tolerance
+        )
+
+    def markFetched(self, tiers, now):
+        for tier in tiers:
+            self._lastFetched[tier] = now
+
+    @property
+    def lastFetched(self):
+        """Monotonic time of the last fetch per tier."""
+        return dict(self._lastFetched)
+
+    def adaptTo(self, carStatus, now):
+        """Select the intervals for the car status of the last poll."""
+        if now < self._boostedUntil or carStatus == CAR_STATUS_CHARGING or carStatus is None:
+            fastInterval, normalInterval = self._chargingIntervals
+        elif carStatus == CAR_STATUS_NO_CAR:
+            fastInterval = normalInterval = self._noCarInterval
+        else:
+            fastInterval = normalInterval = self._idleInterval
+        self._intervals[TIER_FAST] = fastInterval
+        self._intervals[TIER_NORMAL] = normalInterval
+
+    def boost(self, now):
+        """Use the charging intervals for BOOST_DURATION, e.g. after a setting was changed."""
+        self._boostedUntil = now + BOOST_DURATION.total_seconds()
+        self.adaptTo(CAR_STATUS_CHARGING, now)
+
+    def requestFullUpdate(self):
+        """Let the next poll take over all changeable values, e.g. after a setting was changed."""
+        self._lastFetched.pop(TIER_FAST, None)
+        self._lastFetched.pop(TIER_NORMAL, None)
+
+    @staticmethod
+    def merge(previousData, fetchedStatus, tiers):
+        """Return new data with the values of the given tiers taken from fetchedStatus.
+
+        fetchedStatus may only contain some keys, all other values are kept from previousData.
+        """
+        if previousData is None:
+            return fetchedStatus
+        data = dict(previousData)
+        for key, value in fetchedStatus.items():
+            if tierOf(key) in tiers:
+                data[key] = value
+        return data
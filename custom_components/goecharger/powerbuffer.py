@@ -0,0 +1,182 @@
+"""In-memory power telemetry of a charger: raw samples and min/mean/max rollups in arrays."""
+import bisect
+from array import array
+
+FIELDS = ('p_all', 'p_l1', 'p_l2', 'p_l3')
+
+RAW = 'raw'
+# resolution: (seconds per bucket, buckets kept)
+ROLLUPS = {
+    '1m': (60, 360),    # 6 hours
+    '15m': (900, 672),  # 7 days
+}
+# raw samples kept, 20 minutes with a sample every 2 seconds
+RAW_CAPACITY = 600
+RESOLUTIONS = (RAW,) + tuple(ROLLUPS)
+
+
+class _Aggregate:
+    """min, sum and max of the samples of every field since the last reset."""
+
+    __slots__ = ('count', 'min', 'sum', 'max')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.min = [float('inf')] * len(FIELDS)
+        self.sum = [0.0] * len(FIELDS)
+        self.max = [float('-inf')] * len(FIELDS)
+
+    def add(self, values):
+        self.count += 1
+        for index, value in enumerate(values):
+            if value < self.min[index]:
+                self.min[index] = value
+            if value > self.max[index]:
+                self.max[index] = value
+            self.sum[index] += value
+
+    def row(self):
+        """min, mean and max of every field."""
+        return [
+            value
+            for index in range(len(FIELDS))
+            for value in (self.min[index], self.sum[index] / self.count, self.max[index])
+        ]
+
+
+class _Series:
+    """Rows of a time column and value columns in a ring of arrays, which grow up to capacity.
+
+    The rows are appended in time order, so the time column is sorted from the oldest row on.
+    """
+
+    __slots__ = ('capacity', 'time', 'columns', '_oldest')
+
+    def __init__(self, capacity, columns):
+        self.capacity = capacity
+        self.time = array('d')
+        # float32 is precise enough for kW and halves the memory
+        self.columns = [array('f') for _ in range(columns)]
+        # physical index of the oldest row once the ring is full
+        self._oldest = 0
+
+    def __len__(self):
+        return len(self.time)
+
+    def __getitem__(self, index):
+        """Time of the index-th row, oldest first."""
+        return self.time[(self._oldest + index) % len(self.time)]
+
+    def append(self, time, values):
+        if len(self.time) < self.capacity:
+            self.time.append(time)
+            for column, value in zip(self.columns, values):
+                column.append(value)
+            return
+        self.time[self._oldest] = time
+        for column, value in zip(self.columns, values):
+            column[self._oldest] = value
+        self._oldest = (self._oldest + 1) % self.capacity
+
+    def _slice(self, column, first, last):
+        """Rows first to last of a column, one or two array slices copied into a list."""
+        start = (self._oldest + first) % len(self.time)
+        stop = start + last - first
+        if stop <= len(self.time):
+            return column[start:stop].tolist()
+        return column[start:].tolist() + column[:stop - len(self.time)].tolist()
+
+    def range(self, start, end):
+        """Times and value columns of the rows from start to end."""
+        first = 0 if start is None else bisect.bisect_left(self, start)
+        last = len(self) if end is None else bisect.bisect_right(self, end)
+        if first >= last:
+            return [], [[] for _ in self.columns]
+        return self._slice(self.time, first, last), [self._slice(column, first, last) for column in self.columns]
+
+
+class _Rollup:
+    """Buckets with min, mean and max of the samples within period seconds."""
+
+    __slots__ = ('period', 'series', '_bucket', '_aggregate')
+
+    def __init__(self, period, capacity):
+        self.period = period
+        self.series = _Series(capacity, 3 * len(FIELDS))
+        self._bucket = None
+        self._aggregate = _Aggregate()
+
+    def add(self, time, values):
+        bucket = time - time % self.period
+        if bucket != self._bucket:
+            if self._aggregate.count:
+                self.series.append(self._bucket, self._aggregate.row())
+                self._aggregate.reset()
+            self._bucket = bucket
+        self._aggregate.add(values)
+
+    def range(self, start, end):
+        """Like _Series.range, including the bucket which is still filled."""
+        times, columns = self.series.range(start, end)
+        bucket = self._bucket
+        if self._aggregate.count and (start is None or bucket >= start) and (end is None or bucket <= end):
+            times.append(bucket)
+            for column, value in zip(columns, self._aggregate.row()):
+                column.append(value)
+        return times, columns
+
+
+class PowerTelemetry:
+    """Power samples of a charger for a short window and their rollups for longer ones.
+
+    Recording a sample is O(1) and the arrays never grow beyond their capacity.
+    """
+
+    def __init__(self):
+        self._raw = _Series(RAW_CAPACITY, len(FIELDS))
+        self._rollups = {resolution: _Rollup(*rollup) for resolution, rollup in ROLLUPS.items()}
+        # samples since the last takeSummary
+        self._pending = _Aggregate()
+
+    def add(self, time, values):
+        """Record the values of FIELDS at time (seconds since the epoch)."""
+        self._raw.append(time, values)
+        for rollup in self._rollups.values():
+            rollup.add(time, values)
+        self._pending.add(values)
+
+    def takeSummary(self):
+        """min, mean and max of every field since the last call, None without samples."""
+        if not self._pending.count:
+            return None
+        row = self._pending.row()
+        self._pending.reset()
+        return {
+            field: dict(zip(('min', 'mean', 'max'), row[3 * index:3 * index + 3])) for index, field in enumerate(FIELDS)
+        }
+
+    def resolutionFor(self, start):
+        """The finest resolution which still contains start."""
+        for resolution in RESOLUTIONS:
+            series = self._raw if resolution == RAW else self._rollups[resolution].series
+            if len(series) < series.capacity or (start is not None and series[0] <= start):
+                return resolution
+        return RESOLUTIONS[-1]
+
+    def query(self, start=None, end=None, resolution=None):
+        """Samples or buckets from start to end (seconds since the epoch).
+
+        Raw samples are returned as one list per field, buckets as min, mean and max lists per field.
+        """
+        resolution = resolution or self.resolutionFor(start)
+        if resolution == RAW:
+            times, columns = self._raw.range(start, end)
+            return {'resolution': resolution, 'time': times, **dict(zip(FIELDS, columns))}
+        times, columns = self._rollups[resolution].range(start, end)
+        result = {'resolution': resolution, 'time': times}
+        for index, field in enumerate(FIELDS):
+            result[field] = dict(zip(('min', 'mean', 'max'), columns[3 * index:3 * index + 3]))
+        return result
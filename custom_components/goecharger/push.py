@@ -0,0 +1,92 @@
+"""MQTT push updates for the go-eCharger integration."""
+import json
+import logging
+import time
+
+from homeassistant.components import mqtt
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_call_later
+from goecharger.goecharger import GoeChargerStatusMapper
+
+from .api import mapV2Status
+from .polling import TIER_FAST, tierOf
+
+_LOGGER = logging.getLogger(__name__)
+
+# collect the single values a v2 charger publishes into one coordinator update
+PUSH_BATCH_DELAY = 0.1
+
+
+class ChargerPushListener:
+    """Feeds the status a charger publishes via MQTT into its coordinator.
+
+    Subscribes to <topic>/#. Chargers with api v1 publish their complete status as json on
+    <topic>/status, chargers with api v2 publish every value on its own topic <topic>/<key>.
+    Every update resets the poll timer of the coordinator, so polls only happen as a
+    fallback when the charger stops publishing.
+    """
+
+    def __init__(self, hass, chargerName, coordinator, topic):
+        self._hass = hass
+        self._chargerName = chargerName
+        self._coordinator = coordinator
+        self._topic = topic.rstrip('/')
+        self._unsubscribe = None
+        self._pendingStatus = {}
+        self._pendingComplete = False
+        self._cancelFlush = None
+        self.receivedMessages = 0
+
+    async def async_start(self):
+        if not await mqtt.async_wait_for_mqtt_client(self._hass):
+            _LOGGER.error(f"MQTT is not available, charger '{self._chargerName}' is only polled")
+            return
+        self._unsubscribe = await mqtt.async_subscribe(
+            self._hass, f"{self._topic}/#", self._async_message_received
+        )
+        _LOGGER.debug(f"subscribed to '{self._topic}/#' for charger '{self._chargerName}'")
+
+    @callback
+    def async_stop(self):
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+        if self._cancelFlush is not None:
+            self._cancelFlush()
+            self._cancelFlush = None
+
+    @callback
+    def _async_message_received(self, msg):
+        key = msg.topic[len(self._topic) + 1:]
+        try:
+            value = json.loads(msg.payload)
+        except ValueError:
+            _LOGGER.debug(f"ignoring invalid payload on '{msg.topic}'")
+            return
+        self.receivedMessages += 1
+
+        if key == 'status' and isinstance(value, dict):
+            status = GoeChargerStatusMapper().mapApiStatusResponse(value)
+            if status['car_status'] == 'unknown':
+                return
+            self._pendingComplete = True
+        else:
+            status = mapV2Status({key: value})
+            if not status:
+                return
+        self._pendingStatus.update(status)
+        if self._cancelFlush is None:
+            self._cancelFlush = async_call_later(self._hass, PUSH_BATCH_DELAY, self._async_flush)
+
+    @callback
+    def _async_flush(self, _now):
+        self._cancelFlush = None
+        pendingStatus, self._pendingStatus = self._pendingStatus, {}
+        pendingComplete, self._pendingComplete = self._pendingComplete, False
+        if self._coordinator.data is None and not pendingComplete:
+            # single pushed values are not enough for all entities, wait for the first poll
+            return
+        self._coordinator.updated = time.monotonic()
+        if any(tierOf(key) == TIER_FAST for key in pendingStatus):
+            self._coordinator.measurements += 1
+        self._coordinator.async_set_updated_data({**(self._coordinator.data or {}), **pendingStatus})
@@ -0,0 +1,102 @@
+"""Serialization of the requests to one charger."""
+import asyncio
+import heapq
+import itertools
+import time
+
+PRIORITY_COMMAND = 0
+PRIORITY_POLL = 1
+
+
+class _Request:
+    __slots__ = ('factory', 'future', 'mergeKey', 'queued', 'task', 'waiters')
+
+    def __init__(self, factory, mergeKey):
+        self.factory = factory
+        self.future = asyncio.get_running_loop().create_future()
+        self.mergeKey = mergeKey
+        self.queued = time.perf_counter()
+        self.task = None
+        self.waiters = 0
+
+
+class RequestScheduler:
+    """Sends the requests to one charger one at a time, the firmware handles parallel connections poorly.
+
+    Commands go ahead of polls. A request with the mergeKey of a request which is still queued
+    is not queued again, its caller gets the result of the queued one. A request whose callers
+    all gave up is dropped, or cancelled if it already runs, so it does not hold up the requests
+    behind it. Requests to different chargers are not affected, every charger has its own scheduler.
+    """
+
+    def __init__(self, metrics):
+        self._metrics = metrics
+        self._queue = []
+        self._order = itertools.count()
+        self._queuedByKey = {}
+        self._worker = None
+
+    def __len__(self):
+        return len(self._queue)
+
+    async def run(self, factory, priority=PRIORITY_POLL, mergeKey=None):
+        """Await factory() once the requests before it are done, returns its result."""
+        request = self._queuedByKey.get(mergeKey) if mergeKey is not None else None
+        if request is not None:
+            self._metrics.mergedRequests += 1
+        else:
+            request = _Request(factory, mergeKey)
+            heapq.heappush(self._queue, (priority, next(self._order), request))
+            if mergeKey is not None:
+                self._queuedByKey[mergeKey] = request
+            self._metrics.queueDepth = len(self._queue)
+            self._metrics.maxQueueDepth = max(self._metrics.maxQueueDepth, len(self._queue))
+            if self._worker is None:
+                self._worker = asyncio.get_running_loop().create_task(self._work())
+
+        request.waiters += 1
+        try:
+            # merged callers share the future, one caller giving up must not cancel it for the others
+            return await asyncio.shield(request.future)
+        finally:
+            request.waiters -= 1
+            if not request.waiters and request.task is not None:
+                # nobody waits for the answer any more, e.g. after a timeout
+                request.task.cancel()
+
+    async def _work(self):
+        try:
+            while self._queue:
+                _, _, request = heapq.heappop(self._queue)
+                self._metrics.queueDepth = len(self._queue)
+                if request.mergeKey is not None:
+                    self._queuedByKey.pop(request.mergeKey, None)
+                if not request.waiters:
+                    # all callers gave up, e.g. after a timeout
+                    request.future.cancel()
+                    continue
+                self._metrics.queueWait.add(time.perf_counter() - request.queued)
+                task = request.task = asyncio.get_running_loop().create_task(request.factory())
+                try:
+                    # unlike awaiting the task, waiting for it tells its cancellation apart from the worker's
+                    await asyncio.wait((task,))
+                except asyncio.CancelledError:
+                    task.cancel()
+                    request.future.cancel()
+                    raise
+                finally:
+                    request.task = None
+                if task.cancelled():
+                    request.future.cancel()
+                elif task.exception() is not None:
+                    request.future.set_exception(task.exception())
+                else:
+                    request.future.set_result(task.result())
+        finally:
+            self._worker = None
+            # only left over if the worker was cancelled, e.g. on shutdown
+            for _, _, request in self._queue:
+                request.future.cancel()
+            self._queue.clear()
+            self._queuedByKey.clear()
+            self._metrics.queueDepth = 0
@@ -1,12 +1,14 @@
 """Platform for go-eCharger sensor integration."""
 import logging
+import time
+from collections import namedtuple
 from homeassistant.const import (
+    EntityCategory,
     UnitOfTemperature,
     UnitOfEnergy
 )
 
 from homeassistant import core, config_entries
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.components.sensor import (
     SensorStateClass,
     SensorDeviceClass,
@@ -15,137 +17,235 @@ from homeassistant.components.sensor import (
 
 
 from .const import CONF_CHARGERS, DOMAIN, CONF_NAME, CONF_CORRECTION_FACTOR
+from .entity import GoeChargerEntity
+from .metrics import summarize
 
 AMPERE = 'A'
 VOLT = 'V'
 UnitOfEnergy.KILO_WATT = 'kW'
 CARD_ID = 'Card ID'
 PERCENT = '%'
+MILLISECONDS = 'ms'
+BYTES = 'B'
+
+# the metric sensors of one update round share one summary of the metrics
+METRICS_SUMMARY_MAX_AGE = 5
 
 _LOGGER = logging.getLogger(__name__)
 
-_sensorUnits = {
-    'charger_temp': {'unit': UnitOfTemperature.CELSIUS, 'name': 'Charger Temp'},
-    'charger_temp0': {'unit': UnitOfTemperature.CELSIUS, 'name': 'Charger Temp 0'},
-    'charger_temp1': {'unit': UnitOfTemperature.CELSIUS, 'name': 'Charger Temp 1'},
-    'charger_temp2': {'unit': UnitOfTemperature.CELSIUS, 'name': 'Charger Temp 2'},
-    'charger_temp3': {'unit': UnitOfTemperature.CELSIUS, 'name': 'Charger Temp 3'},
-    'p_l1': {'unit': UnitOfEnergy.KILO_WATT, 'name': 'Power L1'},
-    'p_l2': {'unit': UnitOfEnergy.KILO_WATT, 'name': 'Power L2'},
-    'p_l3': {'unit': UnitOfEnergy.KILO_WATT, 'name': 'Power L3'},
-    'p_n': {'unit': UnitOfEnergy.KILO_WATT, 'name': 'Power N'},
-    'p_all': {'unit': UnitOfEnergy.KILO_WATT, 'name': 'Power All'},
-    'current_session_charged_energy': {'unit': UnitOfEnergy.KILO_WATT_HOUR, 'name': 'Current Session charged'},
-    'current_session_charged_energy_corrected': {'unit': UnitOfEnergy.KILO_WATT_HOUR, 'name': 'Current Session charged corrected'},
-    'energy_total': {'unit': UnitOfEnergy.KILO_WATT_HOUR, 'name': 'Total Charged'},
-    'energy_total_corrected': {'unit': UnitOfEnergy.KILO_WATT_HOUR, 'name': 'Total Charged corrected'},
-    'charge_limit': {'unit': UnitOfEnergy.KILO_WATT_HOUR, 'name': 'Charge limit'},
-    'u_l1': {'unit': VOLT, 'name': 'Voltage L1'},
-    'u_l2': {'unit': VOLT, 'name': 'Voltage L2'},
-    'u_l3': {'unit': VOLT, 'name': 'Voltage L3'},
-    'u_n': {'unit': VOLT, 'name': 'Voltage N'},
-    'i_l1': {'unit': AMPERE, 'name': 'Current L1'},
-    'i_l2': {'unit': AMPERE, 'name': 'Current L2'},
-    'i_l3': {'unit': AMPERE, 'name': 'Current L3'},
-    'charger_max_current': {'unit': AMPERE, 'name': 'Charger max current setting'},
-    'charger_absolute_max_current': {'unit': AMPERE, 'name': 'Charger absolute max current setting'},
-    'cable_lock_mode': {'unit': '', 'name': 'Cable lock mode'},
-    'cable_max_current': {'unit': AMPERE, 'name': 'Cable max current'},
-    'unlocked_by_card': {'unit': CARD_ID, 'name': 'Card used'},
-    'lf_l1': {'unit': PERCENT, 'name': 'Power factor L1'},
-    'lf_l2': {'unit': PERCENT, 'name': 'Power factor L2'},
-    'lf_l3': {'unit': PERCENT, 'name': 'Power factor L3'},
-    'lf_n': {'unit': PERCENT, 'name': 'Loadfactor N'},
-    'car_status': {'unit': '', 'name': 'Status'}
-}
-
-_sensorStateClass = {
-    'energy_total': SensorStateClass.TOTAL_INCREASING,
-    'energy_total_corrected': SensorStateClass.TOTAL_INCREASING,
-    'current_session_charged_energy': SensorStateClass.TOTAL_INCREASING,
-    'current_session_charged_energy_corrected': SensorStateClass.TOTAL_INCREASING
-}
-
-_sensorDeviceClass = {
-    'energy_total': SensorDeviceClass.ENERGY,
-    'energy_total_corrected': SensorDeviceClass.ENERGY,
-    'current_session_charged_energy': SensorDeviceClass.ENERGY,
-    'current_session_charged_energy_corrected': SensorDeviceClass.ENERGY
-}
-
-_sensors = [
-    'car_status',
-    'charger_max_current',
-    'charger_absolute_max_current',
-    'charger_err',
-    'charger_access',
-    'stop_mode',
-    'cable_lock_mode',
-    'cable_max_current',
-    'pre_contactor_l1',
-    'pre_contactor_l2',
-    'pre_contactor_l3',
-    'post_contactor_l1',
-    'post_contactor_l2',
-    'post_contactor_l3',
-    'charger_temp',
-    'charger_temp0',
-    'charger_temp1',
-    'charger_temp2',
-    'charger_temp3',
-    'current_session_charged_energy',
-    'current_session_charged_energy_corrected',
-    'charge_limit',
-    'adapter',
-    'unlocked_by_card',
-    'energy_total',
-    'energy_total_corrected',
-    'wifi',
-
-    'u_l1',
-    'u_l2',
-    'u_l3',
-    'u_n',
-    'i_l1',
-    'i_l2',
-    'i_l3',
-    'p_l1',
-    'p_l2',
-    'p_l3',
-    'p_n',
-    'p_all',
-    'lf_l1',
-    'lf_l2',
-    'lf_l3',
-    'lf_n',
-
-    'firmware',
-    'serial_number',
-    'wifi_ssid',
-    'wifi_enabled',
-    'timezone_offset',
-    'timezone_dst_offset',
-]
+# key: sensor key, sourceKey: status key the value is read from,
+# transform: derives the value from the source value and the correction factor of the charger
+SensorDescription = namedtuple(
+    'SensorDescription', ['key', 'name', 'unit', 'stateClass', 'deviceClass', 'sourceKey', 'transform']
+)
 
 
-def _create_sensors_for_charger(chargerName, hass, correctionFactor):
-    entities = []
+def _corrected(value, correctionFactor):
+    return value * correctionFactor
+
+
+# sensors without unit, state class or device class keep the empty strings they always had
+def _sensor(key, name=None, unit='', stateClass='', deviceClass='', transform=None):
+    return SensorDescription(
+        key, name or key, unit, stateClass, deviceClass, key.removesuffix('_corrected'), transform
+    )
+
+
+def _energySensor(key, name, transform=None):
+    return _sensor(
+        key, name, UnitOfEnergy.KILO_WATT_HOUR, SensorStateClass.TOTAL_INCREASING, SensorDeviceClass.ENERGY,
+        transform
+    )
+
+
+_sensors = (
+    _sensor('car_status', 'Status'),
+    _sensor('charger_max_current', 'Charger max current setting', AMPERE),
+    _sensor('charger_absolute_max_current', 'Charger absolute max current setting', AMPERE),
+    _sensor('charger_err'),
+    _sensor('charger_access'),
+    _sensor('stop_mode'),
+    _sensor('cable_lock_mode', 'Cable lock mode'),
+    _sensor('cable_max_current', 'Cable max current', AMPERE),
+    _sensor('pre_contactor_l1'),
+    _sensor('pre_contactor_l2'),
+    _sensor('pre_contactor_l3'),
+    _sensor('post_contactor_l1'),
+    _sensor('post_contactor_l2'),
+    _sensor('post_contactor_l3'),
+    _sensor('charger_temp', 'Charger Temp', UnitOfTemperature.CELSIUS),
+    _sensor('charger_temp0', 'Charger Temp 0', UnitOfTemperature.CELSIUS),
+    _sensor('charger_temp1', 'Charger Temp 1', UnitOfTemperature.CELSIUS),
+    _sensor('charger_temp2', 'Charger Temp 2', UnitOfTemperature.CELSIUS),
+    _sensor('charger_temp3', 'Charger Temp 3', UnitOfTemperature.CELSIUS),
+    _energySensor('current_session_charged_energy', 'Current Session charged'),
+    _energySensor('current_session_charged_energy_corrected', 'Current Session charged corrected', _corrected),
+    _sensor('charge_limit', 'Charge limit', UnitOfEnergy.KILO_WATT_HOUR),
+    _sensor('adapter'),
+    _sensor('unlocked_by_card', 'Card used', CARD_ID),
+    _energySensor('energy_total', 'Total Charged'),
+    _energySensor('energy_total_corrected', 'Total Charged corrected', _corrected),
+    _sensor('wifi'),
+
+    _sensor('u_l1', 'Voltage L1', VOLT),
+    _sensor('u_l2', 'Voltage L2', VOLT),
+    _sensor('u_l3', 'Voltage L3', VOLT),
+    _sensor('u_n', 'Voltage N', VOLT),
+    _sensor('i_l1', 'Current L1', AMPERE),
+    _sensor('i_l2', 'Current L2', AMPERE),
+    _sensor('i_l3', 'Current L3', AMPERE),
+    _sensor('p_l1', 'Power L1', UnitOfEnergy.KILO_WATT),
+    _sensor('p_l2', 'Power L2', UnitOfEnergy.KILO_WATT),
+    _sensor('p_l3', 'Power L3', UnitOfEnergy.KILO_WATT),
+    _sensor('p_n', 'Power N', UnitOfEnergy.KILO_WATT),
+    _sensor('p_all', 'Power All', UnitOfEnergy.KILO_WATT),
+    _sensor('lf_l1', 'Power factor L1', PERCENT),
+    _sensor('lf_l2', 'Power factor L2', PERCENT),
+    _sensor('lf_l3', 'Power factor L3', PERCENT),
+    _sensor('lf_n', 'Loadfactor N', PERCENT),
+
+    _sensor('firmware'),
+    _sensor('serial_number'),
+    _sensor('wifi_ssid'),
+    _sensor('wifi_enabled'),
+    _sensor('timezone_offset'),
+    _sensor('timezone_dst_offset'),
+)
+
+
+# mean of a power value over the telemetry interval, with its min and max as attributes
+TelemetrySensorDescription = namedtuple('TelemetrySensorDescription', ['key', 'name', 'field'])
+
+_telemetrySensors = (
+    TelemetrySensorDescription('p_all_mean', 'Power All mean', 'p_all'),
+    TelemetrySensorDescription('p_l1_mean', 'Power L1 mean', 'p_l1'),
+    TelemetrySensorDescription('p_l2_mean', 'Power L2 mean', 'p_l2'),
+    TelemetrySensorDescription('p_l3_mean', 'Power L3 mean', 'p_l3'),
+)
+
+
+def _milliseconds(stats, key):
+    return round(stats[key] * 1000, 3) if stats else None
+
+
+def _errors(summary):
+    return sum(summary[kind]['errors'] + summary[kind]['timeouts'] for kind in ('status', 'set'))
 
-    for sensor in _sensors:
-
-        _LOGGER.debug(f"adding Sensor: {sensor} for charger {chargerName}")
-        sensorUnit = _sensorUnits.get(sensor).get('unit') if _sensorUnits.get(sensor) else ''
-        sensorName = _sensorUnits.get(sensor).get('name') if _sensorUnits.get(sensor) else sensor
-        sensorStateClass = _sensorStateClass[sensor] if sensor in _sensorStateClass else ''
-        sensorDeviceClass = _sensorDeviceClass[sensor] if sensor in _sensorDeviceClass else ''
-        entities.append(
-            GoeChargerSensor(
-                hass.data[DOMAIN]["coordinator"],
-                f"sensor.goecharger_{chargerName}_{sensor}",
-                chargerName, sensorName, sensor, sensorUnit, sensorStateClass, sensorDeviceClass, correctionFactor
-            )
-        )
 
+# value and attributes are read from the metrics summary
+MetricSensorDescription = namedtuple(
+    'MetricSensorDescription', ['key', 'name', 'unit', 'stateClass', 'value', 'attributes']
+)
+
+_metricSensors = (
+    MetricSensorDescription(
+        'request_latency', 'Request latency', MILLISECONDS, SensorStateClass.MEASUREMENT,
+        lambda summary: _milliseconds(summary['status']['latency'], 'p50'),
+        lambda summary: {
+            'p95': _milliseconds(summary['status']['latency'], 'p95'),
+            'max': _milliseconds(summary['status']['latency'], 'max'),
+            'set_p50': _milliseconds(summary['set']['latency'], 'p50'),
+            'histogram': summary['status']['latency_histogram'],
+        },
+    ),
+    MetricSensorDescription(
+        'request_errors', 'Request errors', None, SensorStateClass.TOTAL_INCREASING,
+        _errors,
+        lambda summary: {
+            'requests': summary['status']['requests'] + summary['set']['requests'],
+            'status_errors': summary['status']['errors'],
+            'status_timeouts': summary['status']['timeouts'],
+            'set_errors': summary['set']['errors'],
+            'set_timeouts': summary['set']['timeouts'],
+        },
+    ),
+    MetricSensorDescription(
+        'response_size', 'Response size', BYTES, SensorStateClass.MEASUREMENT,
+        lambda summary: round(summary['status']['size']['mean']) if summary['status']['size'] else None,
+        lambda summary: {'max': summary['status']['size']['max'] if summary['status']['size'] else None},
+    ),
+    MetricSensorDescription(
+        'parse_time', 'Parse time', MILLISECONDS, SensorStateClass.MEASUREMENT,
+        lambda summary: _milliseconds(summary['status']['parse_time'], 'p50'),
+        lambda summary: {
+            'p95': _milliseconds(summary['status']['parse_time'], 'p95'),
+            'max': _milliseconds(summary['status']['parse_time'], 'max'),
+        },
+    ),
+    MetricSensorDescription(
+        'slot_wait', 'Request slot wait', MILLISECONDS, SensorStateClass.MEASUREMENT,
+        lambda summary: _milliseconds(summary['slot_wait'], 'p95'),
+        lambda summary: {
+            'p50': _milliseconds(summary['slot_wait'], 'p50'),
+            'max': _milliseconds(summary['slot_wait'], 'max'),
+        },
+    ),
+    MetricSensorDescription(
+        'queue_wait', 'Request queue wait', MILLISECONDS, SensorStateClass.MEASUREMENT,
+        lambda summary: _milliseconds(summary['queue_wait'], 'p95'),
+        lambda summary: {
+            'p50': _milliseconds(summary['queue_wait'], 'p50'),
+            'max': _milliseconds(summary['queue_wait'], 'max'),
+            'queue_depth': summary['queue_depth'],
+            'max_queue_depth': summary['max_queue_depth'],
+            'merged_requests': summary['merged_requests'],
+        },
+    ),
+    MetricSensorDescription(
+        'update_duration', 'Update duration', MILLISECONDS, SensorStateClass.MEASUREMENT,
+        lambda summary: _milliseconds(summary['update_duration'], 'p50'),
+        lambda summary: {
+            'p95': _milliseconds(summary['update_duration'], 'p95'),
+            'max': _milliseconds(summary['update_duration'], 'max'),
+            'updates': summary['updates'],
+            'overruns': summary['overruns'],
+            'joined_fetches': summary['joined_fetches'],
+            'skipped_fetches': summary['skipped_fetches'],
+        },
+    ),
+)
+
+
+def _metricsSummary(hass, chargerName):
+    """Summary of the metrics of a charger or, without chargerName, of all chargers."""
+    cache = hass.data[DOMAIN].setdefault("metrics_summaries", {})
+    now = time.monotonic()
+    cached = cache.get(chargerName)
+    if cached is not None and now - cached[0] < METRICS_SUMMARY_MAX_AGE:
+        return cached[1]
+    apis = hass.data[DOMAIN]["api"]
+    if chargerName is None:
+        # chargers with the same host share their client
+        metrics = [client.metrics for client in hass.data[DOMAIN]["clients"].values()]
+    else:
+        metrics = [apis[chargerName].metrics] if chargerName in apis else []
+    summary = summarize(metrics)
+    cache[chargerName] = (now, summary)
+    return summary
+
+
+def _create_metric_sensors(hass, chargerName=None):
+    return [GoeChargerMetricSensor(chargerName, description) for description in _metricSensors]
+
+
+def _create_fleet_metric_sensors(hass, owner):
+    """The fleet wide metric sensors, only created by the first platform setup, owner is its config entry."""
+    if hass.data[DOMAIN].get("fleet_metric_sensors"):
+        return []
+    hass.data[DOMAIN]["fleet_metric_sensors"] = owner
+    return _create_metric_sensors(hass)
+
+
+def _create_sensors_for_charger(chargerName, hass, correctionFactor):
+    _LOGGER.debug(f"adding {len(_sensors)} sensors for charger {chargerName}")
+    coordinator = hass.data[DOMAIN]["coordinators"][chargerName]
+    entities = [GoeChargerSensor(coordinator, chargerName, description, correctionFactor) for description in _sensors]
+    telemetry = hass.data[DOMAIN]["telemetry"].get(chargerName)
+    if telemetry is not None:
+        entities.extend(
+            GoeChargerTelemetrySensor(telemetry, chargerName, description) for description in _telemetrySensors
+        )
+    entities.extend(_create_metric_sensors(hass, chargerName))
     return entities
 
 
@@ -168,7 +268,10 @@ async def async_setup_entry(
 
     _LOGGER.debug(f"charger name: '{chargerName}'")
     _LOGGER.debug(f"config: '{config}'")
-    async_add_entities(_create_sensors_for_charger(chargerName, hass, correctionFactor))
+    async_add_entities(
+        _create_sensors_for_charger(chargerName, hass, correctionFactor)
+        + _create_fleet_metric_sensors(hass, config_entry.entry_id)
+    )
 
 
 async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
@@ -194,21 +297,19 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
 
         entities.extend(_create_sensors_for_charger(chargerName, hass, correctionFactor))
 
+    entities.extend(_create_fleet_metric_sensors(hass, True))
     async_add_entities(entities)
 
 
-class GoeChargerSensor(CoordinatorEntity, SensorEntity):
-    def __init__(self, coordinator, entity_id, chargerName, name, attribute, unit, stateClass, deviceClass, correctionFactor):
+class GoeChargerSensor(GoeChargerEntity, SensorEntity):
+    def __init__(self, coordinator, chargerName, description, correctionFactor):
         """Initialize the go-eCharger sensor."""
 
-        super().__init__(coordinator)
+        # the corrected sensors are derived from the uncorrected values
+        super().__init__(coordinator, description.sourceKey)
         self._chargername = chargerName
-        self.entity_id = entity_id
-        self._name = name
-        self._attribute = attribute
-        self._unit = unit
-        self._attr_state_class = stateClass
-        self._attr_device_class = deviceClass
+        self.entity_id = f"sensor.goecharger_{chargerName}_{description.key}"
+        self._description = description
         self.correctionFactor = correctionFactor
 
 
@@ -227,23 +328,109 @@ class GoeChargerSensor(CoordinatorEntity, SensorEntity):
     @property
     def name(self):
         """Return the name of the sensor."""
-        return self._name
+        return self._description.name
 
     @property
     def unique_id(self):
         """Return the unique_id of the sensor."""
-        return f"{self._chargername}_{self._attribute}"
+        return f"{self._chargername}_{self._description.key}"
+
+    @property
+    def state_class(self):
+        return self._description.stateClass
+
+    @property
+    def device_class(self):
+        return self._description.deviceClass
 
     @property
     def state(self):
         """Return the state of the sensor."""
-        if (self._attribute == 'energy_total_corrected'):
-            return self.coordinator.data[self._chargername]['energy_total'] * self.correctionFactor
-        if (self._attribute == 'current_session_charged_energy_corrected'):
-            return self.coordinator.data[self._chargername]['current_session_charged_energy'] * self.correctionFactor   
-        return self.coordinator.data[self._chargername][self._attribute]
+        description = self._description
+        value = self.coordinator.data[description.sourceKey]
+        if description.transform is None:
+            return value
+        return description.transform(value, self.correctionFactor)
 
     @property
     def unit_of_measurement(self):
         """Return the unit of measurement."""
-        return self._unit
+        return self._description.unit
+
+
+class GoeChargerMetricSensor(SensorEntity):
+    """Diagnostic sensor with request metrics of a charger or, without chargerName, of all chargers.
+
+    The metrics are recorded with every request, the sensors are polled and disabled by default.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, chargerName, description):
+        prefix = chargerName if chargerName is not None else 'fleet'
+        self.entity_id = f"sensor.goecharger_{prefix}_{description.key}"
+        self._attr_unique_id = f"{prefix}_{description.key}"
+        self._attr_name = description.name if chargerName is not None else f"go-eCharger fleet {description.name.lower()}"
+        self._attr_native_unit_of_measurement = description.unit
+        self._attr_state_class = description.stateClass
+        self._chargername = chargerName
+        self._description = description
+        self._summary = None
+        if chargerName is not None:
+            self._attr_device_info = {
+                "identifiers": {(DOMAIN, chargerName)},
+                "name": chargerName,
+                "manufacturer": "go-e",
+                "model": "HOME",
+            }
+
+    async def async_update(self):
+        self._summary = _metricsSummary(self.hass, self._chargername)
+
+    @property
+    def native_value(self):
+        return self._description.value(self._summary) if self._summary else None
+
+    @property
+    def extra_state_attributes(self):
+        return self._description.attributes(self._summary) if self._summary else None
+
+
+class GoeChargerTelemetrySensor(SensorEntity):
+    """Mean power of a charger over the telemetry interval, written once per interval."""
+
+    _attr_should_poll = False
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT
+
+    def __init__(self, telemetry, chargerName, description):
+        self.entity_id = f"sensor.goecharger_{chargerName}_{description.key}"
+        self._attr_unique_id = f"{chargerName}_{description.key}"
+        self._attr_name = description.name
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, chargerName)},
+            "name": chargerName,
+            "manufacturer": "go-e",
+            "model": "HOME",
+        }
+        self._telemetry = telemetry
+        self._description = description
+
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+        self.async_on_remove(self._telemetry.async_add_listener(self.async_write_ha_state))
+
+    def _values(self):
+        summary = self._telemetry.summary
+        return summary[self._description.field] if summary else None
+
+    @property
+    def native_value(self):
+        values = self._values()
+        return round(values['mean'], 3) if values else None
+
+    @property
+    def extra_state_attributes(self):
+        values = self._values()
+        return {'min': values['min'], 'max': values['max']} if values else None
@@ -0,0 +1,149 @@
+"""Detection of the charging sessions of the go-eChargers."""
+import logging
+import os
+import time
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import callback
+
+from .const import DOMAIN
+from .history import Session, SessionRing
+
+_LOGGER = logging.getLogger(__name__)
+
+SESSION_KEYS = ('car_status', 'current_session_charged_energy', 'p_all', 'unlocked_by_card')
+NO_CAR = 'Charger ready, no vehicle'
+# a drop of the session energy by more than this (kWh) while the car stays connected starts a new session
+ENERGY_RESET = 0.05
+
+
+def sessionHistoryPath(hass, chargerName):
+    return hass.config.path(".storage", f"{DOMAIN}.{chargerName}.sessions")
+
+
+def _openRing(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return SessionRing(path)
+
+
+class SessionTracker:
+    """Detects the charging sessions of a charger in the updates of its coordinator.
+
+    A session starts when a car is connected and ends when it is disconnected or the charger
+    starts counting the session energy from zero again. Finished sessions are appended to the
+    session history of the charger, the open session is kept in it over restarts. The history
+    is flushed to disk when the tracker is stopped or Home Assistant shuts down.
+    """
+
+    def __init__(self, hass, chargerName, coordinator):
+        self._hass = hass
+        self._chargerName = chargerName
+        self._coordinator = coordinator
+        self._ring = None
+        self._session = None
+        for key in SESSION_KEYS:
+            coordinator.addNeededKey(key)
+        self._removeListener = coordinator.async_add_listener(self._async_update)
+        self._removeStopListener = hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, self._async_shutdown)
+
+    async def async_start(self):
+        """Open the session history, the sessions are tracked from then on."""
+        if self._ring is not None:
+            return
+        try:
+            ring = await self._hass.async_add_executor_job(_openRing, sessionHistoryPath(self._hass, self._chargerName))
+        except (OSError, ValueError) as e:
+            _LOGGER.warning(f"Unable to open the session history of Charger {self._chargerName}: {e!r}")
+            return
+        if self._removeListener is None:
+            # stopped meanwhile
+            await self._hass.async_add_executor_job(ring.close)
+            return
+        self._ring = ring
+        self._session = ring.openSession
+
+    def query(self, start=None, end=None, card=None):
+        """Finished sessions and the open session which overlap start to end, oldest first."""
+        if self._ring is None:
+            return []
+        sessions = self._ring.query(start, end, card)
+        session = self._session
+        if (
+            session is not None
+            and (end is None or session.start <= end)
+            and (card is None or session.card == card)
+        ):
+            sessions.append(session._replace(end=None))
+        return sessions
+
+    def _close(self, session):
+        self._ring.append(session)
+        _LOGGER.debug(f"session of charger '{self._chargerName}' ended: {session}")
+
+    @callback
+    def _async_update(self):
+        data = self._coordinator.data
+        changedKeys = self._coordinator.changedKeys
+        if (
+            self._ring is None
+            or data is None
+            or self._coordinator.stale
+            or (changedKeys is not None and changedKeys.isdisjoint(SESSION_KEYS))
+        ):
+            return
+        carStatus = data.get('car_status', 'unknown')
+        energy = data.get('current_session_charged_energy')
+        if carStatus == 'unknown' or energy is None:
+            return
+
+        now = time.time()
+        session = self._session
+        if session is not None and carStatus == NO_CAR:
+            self._close(session._replace(end=now))
+            session = None
+        elif session is not None and energy < session.energy - ENERGY_RESET:
+            # the new session started after the last update of the old one
+            self._close(session)
+            session = None
+        if session is None and carStatus != NO_CAR:
+            session = Session(now, now, energy, 0.0, 0)
+        if session is not None:
+            session = Session(
+                session.start,
+                now,
+                max(energy, session.energy),
+                max(data.get('p_all') or 0.0, session.peakPower),
+                int(data.get('unlocked_by_card') or 0) or session.card,
+            )
+        if session != self._session:
+            self._session = session
+            self._ring.openSession = session
+
+    @callback
+    def _async_shutdown(self, _event):
+        self._removeStopListener = None
+        self.async_stop()
+
+    @callback
+    def async_stop(self):
+        if self._removeListener is None:
+            return
+        if self._removeStopListener is not None:
+            self._removeStopListener()
+            self._removeStopListener = None
+        self._removeListener()
+        self._removeListener = None
+        for key in SESSION_KEYS:
+            self._coordinator.removeNeededKey(key)
+        if self._ring is not None:
+            ring, self._ring = self._ring, None
+            self._hass.async_add_executor_job(ring.close)
+
+
+def _removeFile(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+async def async_remove_session_history(hass, chargerName):
+    await hass.async_add_executor_job(_removeFile, sessionHistoryPath(hass, chargerName))
@@ -0,0 +1,87 @@
+"""Persistence of the last known state of the go-eCharger."""
+import logging
+import time
+
+from homeassistant.core import callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+# seconds the saving is delayed, so frequent updates only cause a write now and then
+SAVE_DELAY = 60
+
+
+def _stateStore(hass, chargerName):
+    """Store of a charger, one instance per charger, so removing it also cancels its pending save."""
+    stores = hass.data[DOMAIN]["state_stores"]
+    if chargerName not in stores:
+        stores[chargerName] = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{chargerName}")
+    return stores[chargerName]
+
+
+class ChargerStateStore:
+    """Saves the coordinator data of a charger, so it is available right after a restart.
+
+    The fetch times of the poll tiers are saved with the data, so tiers which were fetched
+    shortly before the restart are not requested again right away.
+    """
+
+    def __init__(self, hass, chargerName, coordinator):
+        self._store = _stateStore(hass, chargerName)
+        self._chargerName = chargerName
+        self._coordinator = coordinator
+        self._savePending = False
+        self._removeListener = coordinator.async_add_listener(self._async_schedule_save)
+
+    async def async_restore(self):
+        """Load the saved data as initial data of the coordinator, unless it already has data."""
+        try:
+            stored = await self._store.async_load()
+        except (HomeAssistantError, ValueError) as e:
+            _LOGGER.warning(f"Unable to load the saved state of Charger {self._chargerName}: {e!r}")
+            return
+        if not stored or self._coordinator.data is not None:
+            return
+
+        nowWall, nowMonotonic = time.time(), time.monotonic()
+        for tier, fetched in stored["fetched"].items():
+            age = max(nowWall - fetched, 0)
+            self._coordinator.pollTiers.markFetched([tier], nowMonotonic - age)
+        if stored["fetched"]:
+            self._coordinator.updated = nowMonotonic - max(nowWall - max(stored["fetched"].values()), 0)
+        _LOGGER.debug(f"restored state of charger '{self._chargerName}' from {stored['fetched']}")
+        self._coordinator.stale = True
+        self._coordinator.data = stored["data"]
+        self._coordinator.async_update_listeners()
+
+    @callback
+    def _async_schedule_save(self):
+        if self._savePending or self._coordinator.data is None or self._coordinator.changedKeys == set():
+            return
+        self._savePending = True
+        self._store.async_delay_save(self._dataToSave, SAVE_DELAY)
+
+    def _dataToSave(self):
+        self._savePending = False
+        nowWall, nowMonotonic = time.time(), time.monotonic()
+        return {
+            "fetched": {
+                tier: nowWall - (nowMonotonic - fetched)
+                for tier, fetched in self._coordinator.pollTiers.lastFetched.items()
+            },
+            "data": self._coordinator.data,
+        }
+
+    @callback
+    def async_stop(self):
+        self._removeListener()
+
+
+async def async_remove_saved_state(hass, chargerName):
+    # the pending save of the charger would write the file again on shutdown
+    await _stateStore(hass, chargerName).async_remove()
+    hass.data[DOMAIN]["state_stores"].pop(chargerName, None)
@@ -1,13 +1,10 @@
 """Platform for go-eCharger switch integration."""
 import logging
 from homeassistant.components.switch import SwitchEntity
-from homeassistant.const import CONF_HOST
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant import core, config_entries
 
-from goecharger import GoeCharger
-
-from .const import DOMAIN, CONF_CHARGERS, CONF_NAME, CHARGER_API
+from .const import DOMAIN, CONF_CHARGERS, CONF_NAME
+from .entity import GoeChargerEntity
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -22,15 +19,15 @@ async def async_setup_entry(
     config = config_entry.as_dict()["data"]
 
     chargerName = config[CONF_NAME]
-    host = config[CONF_HOST]
-    chargerApi = GoeCharger(host)
+    # the client of the charger is shared with its coordinator
+    chargerApi = hass.data[DOMAIN]["api"][chargerName]
 
     entities = []
 
     attribute = "allow_charging"
     entities.append(
         GoeChargerSwitch(
-            hass.data[DOMAIN]["coordinator"],
+            hass.data[DOMAIN]["coordinators"][chargerName],
             hass,
             chargerApi,
             f"switch.goecharger_{chargerName}_{attribute}",
@@ -50,7 +47,7 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
     _LOGGER.debug("setup_platform")
 
     chargers = discovery_info[CONF_CHARGERS]
-    chargerApi = discovery_info[CHARGER_API]
+    chargerApi = hass.data[DOMAIN]["api"]
 
     entities = []
 
@@ -60,7 +57,7 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
         attribute = "allow_charging"
         entities.append(
             GoeChargerSwitch(
-                hass.data[DOMAIN]["coordinator"],
+                hass.data[DOMAIN]["coordinators"][chargerName],
                 hass,
                 chargerApi[chargerName],
                 f"switch.goecharger_{chargerName}_{attribute}",
@@ -72,10 +69,10 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
     async_add_entities(entities)
 
 
-class GoeChargerSwitch(CoordinatorEntity, SwitchEntity):
+class GoeChargerSwitch(GoeChargerEntity, SwitchEntity):
     def __init__(self, coordinator, hass, goeCharger, entity_id, chargerName, name, attribute):
         """Initialize the go-eCharger switch."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, attribute)
         self.entity_id = entity_id
         self._chargername = chargerName
         self._name = name
@@ -98,13 +95,11 @@ class GoeChargerSwitch(CoordinatorEntity, SwitchEntity):
 
     async def async_turn_on(self, **kwargs):
         """Turn the entity on."""
-        await self.hass.async_add_executor_job(self._goeCharger.setAllowCharging, True)
-        await self.coordinator.async_request_refresh()
+        self.coordinator.async_apply_set_result(await self._goeCharger.setAllowCharging(True))
 
     async def async_turn_off(self, **kwargs):
         """Turn the entity off."""
-        await self.hass.async_add_executor_job(self._goeCharger.setAllowCharging, False)
-        await self.coordinator.async_request_refresh()
+        self.coordinator.async_apply_set_result(await self._goeCharger.setAllowCharging(False))
 
     @property
     def name(self):
@@ -119,4 +114,4 @@ class GoeChargerSwitch(CoordinatorEntity, SwitchEntity):
     @property
     def is_on(self):
         """Return the state of the switch."""
-        return True if self.coordinator.data[self._chargername][self._attribute] == "on" else False
+        return True if self.coordinator.data[self._attribute] == "on" else False
@@ -0,0 +1,76 @@
+"""Power telemetry of the go-eChargers, recorded from the updates of the coordinators."""
+import logging
+import time
+
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import DOMAIN
+from .powerbuffer import FIELDS, PowerTelemetry
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ChargerTelemetry:
+    """Records the power values of every update of a charger which measured them, polled or pushed.
+
+    Updates which only take over written settings, see GoeChargerCoordinator.async_apply_set_result,
+    carry no new power values and are not recorded, they would weigh the time of writes more.
+
+    Every summary interval the min/mean/max since the last summary is handed to the telemetry
+    sensors, so only these rolled up values reach the recorder.
+    """
+
+    def __init__(self, coordinator):
+        self._coordinator = coordinator
+        self.buffer = PowerTelemetry()
+        self.summary = None
+        self._listeners = []
+        self._measurements = 0
+        for key in FIELDS:
+            coordinator.addNeededKey(key)
+        self._removeListener = coordinator.async_add_listener(self._async_update)
+
+    @callback
+    def _async_update(self):
+        data = self._coordinator.data
+        if data is None or self._coordinator.stale or data.get('car_status', 'unknown') == 'unknown':
+            return
+        if self._coordinator.measurements == self._measurements:
+            # neither polled nor pushed power values
+            return
+        self._measurements = self._coordinator.measurements
+        values = [data.get(key) for key in FIELDS]
+        if None in values:
+            return
+        self.buffer.add(time.time(), values)
+
+    @callback
+    def async_add_listener(self, updateCallback):
+        """Call updateCallback with every new summary, returns a function removing the listener."""
+        self._listeners.append(updateCallback)
+        return lambda: self._listeners.remove(updateCallback)
+
+    @callback
+    def async_summarize(self):
+        self.summary = self.buffer.takeSummary()
+        for updateCallback in list(self._listeners):
+            updateCallback()
+
+    @callback
+    def async_stop(self):
+        self._removeListener()
+        for key in FIELDS:
+            self._coordinator.removeNeededKey(key)
+
+
+@callback
+def async_start_telemetry_summaries(hass, interval):
+    """Summarize the telemetry of all chargers every interval with a single timer."""
+
+    @callback
+    def summarize(_now):
+        for telemetry in hass.data[DOMAIN]["telemetry"].values():
+            telemetry.async_summarize()
+
+    return async_track_time_interval(hass, summarize, interval, cancel_on_shutdown=True)
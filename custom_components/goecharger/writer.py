@@ -0,0 +1,133 @@
+"""Coalescing of writes to the go-eCharger."""
+import asyncio
+import logging
+import time
+
+import aiohttp
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+# parameter: (status key with the current value, api method which writes the value)
+WRITABLE_PARAMETERS = {
+    'max_current': ('charger_max_current', 'setTmpMaxCurrent'),
+    'absolute_max_current': ('charger_absolute_max_current', 'setAbsoluteMaxCurrent'),
+    'charge_limit': ('charge_limit', 'setChargeLimit'),
+    'cable_lock_mode': ('cable_lock_mode', 'setCableLockMode'),
+}
+
+_NOTHING = object()
+
+
+class CoalescingWriter:
+    """Coalesces the writes of one parameter of one charger.
+
+    A value equal to the current one is not written. After a write, further writes within
+    the window are held back and only the latest of them is written when the window ends.
+    """
+
+    def __init__(self, hass, chargerName, coordinator, statusKey, write, window):
+        self._hass = hass
+        self._chargerName = chargerName
+        self._coordinator = coordinator
+        self._statusKey = statusKey
+        self._write = write
+        self._window = window.total_seconds()
+        self._lastWritten = None
+        self._windowEnd = 0
+        self._pending = _NOTHING
+        self._cancelFlush = None
+        self.writes = 0
+        self.suppressedWrites = 0
+
+    def _currentValue(self):
+        if time.monotonic() < self._windowEnd:
+            # the coordinator data may not contain the written value yet
+            return self._lastWritten
+        data = self._coordinator.data
+        return data.get(self._statusKey) if data else None
+
+    async def async_write(self, value):
+        """Write value, returns True if it was written right away."""
+        if self._cancelFlush is not None:
+            # the latest value is written when the window ends
+            self._pending = value
+            self.suppressedWrites += 1
+            return False
+        if value == self._currentValue():
+            self.suppressedWrites += 1
+            return False
+        now = time.monotonic()
+        if now < self._windowEnd:
+            self._pending = value
+            self._cancelFlush = async_call_later(self._hass, self._windowEnd - now, self._async_flush)
+            return False
+        await self._async_send(value)
+        return True
+
+    async def async_write_now(self, value):
+        """Write value right away without waiting for the window, raises if the write failed.
+
+        For the load balancer, whose lower currents must be in effect before other chargers are
+        raised. A value held back for the end of the window is dropped, it would overwrite value.
+        """
+        self.async_cancel()
+        self._pending = _NOTHING
+        if value == self._currentValue():
+            self.suppressedWrites += 1
+            return
+        await self._async_send(value)
+
+    async def _async_send(self, value):
+        result = await self._write(value)
+        # a failed write leaves the current value to the coordinator data
+        self._lastWritten = value
+        self._windowEnd = time.monotonic() + self._window
+        self.writes += 1
+        self._coordinator.async_apply_set_result(result)
+
+    async def _async_flush(self, _now):
+        self._cancelFlush = None
+        value, self._pending = self._pending, _NOTHING
+        if value is _NOTHING:
+            return
+        if value == self._currentValue():
+            self.suppressedWrites += 1
+            return
+        _LOGGER.debug(f"write coalesced {self._statusKey}={value} to charger '{self._chargerName}'")
+        try:
+            await self._async_send(value)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            _LOGGER.error(f"Unable to write {self._statusKey} to Charger {self._chargerName}: {e!r}")
+
+    @callback
+    def async_cancel(self):
+        if self._cancelFlush is not None:
+            self._cancelFlush()
+            self._cancelFlush = None
+
+
+def async_get_writer(hass, chargerName, parameter):
+    """Return the writer of a parameter of a charger, KeyError if the charger does not exist."""
+    coordinator = hass.data[DOMAIN]["coordinators"][chargerName]
+    writers = hass.data[DOMAIN]["writers"].setdefault(chargerName, {})
+    if parameter not in writers:
+        statusKey, method = WRITABLE_PARAMETERS[parameter]
+        writers[parameter] = CoalescingWriter(
+            hass,
+            chargerName,
+            coordinator,
+            statusKey,
+            getattr(hass.data[DOMAIN]["api"][chargerName], method),
+            hass.data[DOMAIN]["write_coalesce_window"],
+        )
+    return writers[parameter]
+
+
+@callback
+def async_remove_writers(hass, chargerName):
+    for writer in hass.data[DOMAIN]["writers"].pop(chargerName, {}).values():
+        writer.async_cancel()
@@ -0,0 +1,9 @@
+"""Tests of the pure modules of the integration, which are imported directly.
+
+The package itself needs Home Assistant, its modules without Home Assistant dependencies
+are put on the path as top level modules.
+"""
+import pathlib
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent / "custom_components" / "goecharger"))
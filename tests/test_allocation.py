@@ -0,0 +1,110 @@
+"""allocateCurrents against a naive progressive filling and the admission rules."""
+import math
+import random
+
+import pytest
+
+from allocation import MIN_CURRENT, PHASES, ChargerDemand, allocateCurrents
+
+
+def referenceLevels(demands, phaseLimits):
+    """Max-min fair currents, raising all chargers which are not frozen together, one charger at a time."""
+    currents = {demand.name: 0.0 for demand in demands}
+    unfrozen = {demand.name: demand for demand in demands}
+    while unfrozen:
+        level = next(iter(currents[name] for name in unfrozen))
+        steps = [min(demand.maxCurrent for demand in unfrozen.values()) - level]
+        for phase in range(len(phaseLimits)):
+            count = sum(1 for demand in unfrozen.values() if phase in demand.phases)
+            if count:
+                used = sum(currents[demand.name] for demand in demands if phase in demand.phases)
+                steps.append((phaseLimits[phase] - used) / count)
+        level += max(min(steps), 0)
+        for name in unfrozen:
+            currents[name] = level
+        saturated = {
+            phase for phase in range(len(phaseLimits))
+            if sum(currents[demand.name] for demand in demands if phase in demand.phases) >= phaseLimits[phase] - 1e-9
+        }
+        unfrozen = {
+            name: demand for name, demand in unfrozen.items()
+            if demand.maxCurrent > level + 1e-9 and saturated.isdisjoint(demand.phases)
+        }
+    return currents
+
+
+def admittedByPriority(demands, phaseLimits, minCurrent):
+    """Names of the chargers which get minCurrent, charging ones and then by name first."""
+    eligible = [demand for demand in demands if demand.maxCurrent >= minCurrent]
+    needed = [sum(minCurrent for demand in eligible if phase in demand.phases) for phase in range(len(phaseLimits))]
+    if all(need <= limit for need, limit in zip(needed, phaseLimits)):
+        return {demand.name for demand in eligible}
+    headroom = list(phaseLimits)
+    admitted = set()
+    for demand in sorted(eligible, key=lambda demand: (not demand.charging, demand.name)):
+        if all(headroom[phase] >= minCurrent for phase in demand.phases):
+            for phase in demand.phases:
+                headroom[phase] -= minCurrent
+            admitted.add(demand.name)
+    return admitted
+
+
+def randomDemands(rng, count):
+    return [
+        ChargerDemand(
+            f"charger{index}",
+            rng.choice((4, 6, 10, 16, 20, 32)),
+            PHASES if rng.random() < 0.6 else tuple(sorted(rng.sample(PHASES, rng.randint(1, 2)))),
+            rng.random() < 0.7,
+        )
+        for index in range(count)
+    ]
+
+
+def test_equal_share():
+    demands = [ChargerDemand(name, 32, PHASES, True) for name in ('a', 'b')]
+    assert allocateCurrents(demands, [16, 16, 16]) == {'a': 8, 'b': 8}
+
+
+def test_capped_charger_leaves_its_rest_to_the_others():
+    demands = [ChargerDemand('a', 6, PHASES, True), ChargerDemand('b', 32, PHASES, True)]
+    assert allocateCurrents(demands, [20, 20, 20]) == {'a': 6, 'b': 14}
+
+
+def test_single_phase_chargers_use_the_other_phases():
+    demands = [ChargerDemand('a', 32, (0,), True), ChargerDemand('b', 32, PHASES, True)]
+    assert allocateCurrents(demands, [16, 32, 32]) == {'a': 8, 'b': 8}
+    assert allocateCurrents(demands, [32, 10, 32]) == {'a': 22, 'b': 10}
+
+
+def test_charging_car_keeps_its_current():
+    demands = [ChargerDemand('a', 32, PHASES, False), ChargerDemand('b', 32, PHASES, True)]
+    assert allocateCurrents(demands, [10, 10, 10]) == {'a': 0, 'b': 10}
+
+
+def test_charger_below_the_minimum_gets_nothing():
+    demands = [ChargerDemand('a', 4, PHASES, True), ChargerDemand('b', 32, PHASES, True)]
+    assert allocateCurrents(demands, [32, 32, 32]) == {'a': 0, 'b': 32}
+
+
+def test_no_demands():
+    assert allocateCurrents([], [16, 16, 16]) == {}
+
+
+@pytest.mark.parametrize('seed', range(300))
+def test_random_fleets_against_reference(seed):
+    rng = random.Random(seed)
+    demands = randomDemands(rng, rng.randint(1, 8))
+    phaseLimits = [rng.choice((0, 6, 10, 16, 25, 32, 63, 100)) for _phase in PHASES]
+
+    allocation = allocateCurrents(demands, phaseLimits)
+
+    assert set(allocation) == {demand.name for demand in demands}
+    for phase in PHASES:
+        assert sum(allocation[demand.name] for demand in demands if phase in demand.phases) <= phaseLimits[phase]
+    admitted = admittedByPriority(demands, phaseLimits, MIN_CURRENT)
+    assert {name for name, current in allocation.items() if current} == admitted
+    levels = referenceLevels([demand for demand in demands if demand.name in admitted], phaseLimits)
+    for name in admitted:
+        assert allocation[name] == math.floor(levels[name] + 1e-9)
+        assert MIN_CURRENT <= allocation[name]
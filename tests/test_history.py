@@ -0,0 +1,80 @@
+"""SessionRing queries against a linear scan of the sessions it keeps."""
+import random
+
+import pytest
+
+from history import Session, SessionRing
+
+CAPACITY = 16
+
+
+def randomSessions(rng, count):
+    sessions = []
+    time = 1_700_000_000.0
+    for _index in range(count):
+        start = time + rng.randint(0, 3) * 1800
+        end = start + rng.randint(0, 8) * 900
+        # values which float32 keeps exactly
+        sessions.append(Session(start, end, rng.randint(0, 160) / 4, rng.randint(0, 88) / 4, rng.choice((0, 1, 2))))
+        time = end
+    return sessions
+
+
+def linearQuery(sessions, start, end, card):
+    return [
+        session for session in sessions
+        if (start is None or session.end >= start) and (end is None or session.start <= end)
+        and (card is None or session.card == card)
+    ]
+
+
+@pytest.fixture
+def ringPath(tmp_path):
+    return str(tmp_path / "sessions.ring")
+
+
+@pytest.mark.parametrize('count', [0, 1, CAPACITY - 1, CAPACITY, CAPACITY + 1, 3 * CAPACITY + 5])
+def test_query_against_linear_scan(ringPath, count):
+    rng = random.Random(count)
+    sessions = randomSessions(rng, count)
+    ring = SessionRing(ringPath, CAPACITY)
+    for session in sessions:
+        ring.append(session)
+    kept = sessions[-CAPACITY:]
+    try:
+        assert len(ring) == len(kept)
+        assert [ring[index] for index in range(len(ring))] == kept
+        times = sorted({time for session in sessions for time in (session.start, session.end)})
+        bounds = [None] + times + [time + 1 for time in times] + [time - 1 for time in times]
+        for _query in range(300):
+            start, end = rng.choice(bounds), rng.choice(bounds)
+            card = rng.choice((None, 0, 1, 2))
+            assert ring.query(start, end, card) == linearQuery(kept, start, end, card), (start, end, card)
+    finally:
+        ring.close()
+
+
+def test_reopened_ring_keeps_its_sessions_and_capacity(ringPath):
+    sessions = randomSessions(random.Random(1), CAPACITY + 3)
+    ring = SessionRing(ringPath, CAPACITY)
+    for session in sessions:
+        ring.append(session)
+    ring.openSession = Session(sessions[-1].end + 60, 0, 1.5, 11.0, 2)
+    ring.close()
+
+    ring = SessionRing(ringPath)
+    try:
+        assert ring.capacity == CAPACITY
+        assert ring.query() == sessions[-CAPACITY:]
+        assert ring.openSession == Session(sessions[-1].end + 60, 0, 1.5, 11.0, 2)
+        ring.openSession = None
+        assert ring.openSession is None
+    finally:
+        ring.close()
+
+
+def test_other_file_is_rejected(ringPath):
+    with open(ringPath, 'wb') as file:
+        file.write(b'\0' * 1024)
+    with pytest.raises(ValueError):
+        SessionRing(ringPath)
@@ -0,0 +1,84 @@
+"""Ring queries and rollups of the power telemetry against linear scans of all samples."""
+import random
+
+import pytest
+
+from powerbuffer import FIELDS, RAW, ROLLUPS, PowerTelemetry, _Series
+
+
+def linearRange(rows, start, end):
+    return [row for row in rows if (start is None or row[0] >= start) and (end is None or row[0] <= end)]
+
+
+@pytest.mark.parametrize('count', [0, 1, 7, 8, 9, 30])
+def test_series_range_against_linear_scan(count):
+    rng = random.Random(count)
+    series = _Series(8, 2)
+    rows = []
+    time = 0.0
+    for _index in range(count):
+        time += rng.choice((0.5, 1.0, 2.0))
+        # values which float32 keeps exactly
+        row = (time, rng.randint(0, 100) / 4, rng.randint(0, 100) / 4)
+        rows.append(row)
+        series.append(row[0], row[1:])
+    kept = rows[-8:]
+    assert [series[index] for index in range(len(series))] == [row[0] for row in kept]
+    bounds = [None] + [row[0] + offset for row in rows for offset in (-0.25, 0, 0.25)]
+    for _query in range(300):
+        start, end = rng.choice(bounds), rng.choice(bounds)
+        times, columns = series.range(start, end)
+        expected = linearRange(kept, start, end)
+        assert times == [row[0] for row in expected], (start, end)
+        assert columns == [[row[1] for row in expected], [row[2] for row in expected]], (start, end)
+
+
+def test_raw_query_and_rollups_against_linear_scan():
+    rng = random.Random(7)
+    telemetry = PowerTelemetry()
+    samples = []
+    time = 1_700_000_000.0
+    # more samples than the raw ring keeps, over more than one hour
+    for _index in range(2000):
+        time += rng.choice((1.0, 2.0, 3.0))
+        values = [rng.randint(0, 88) / 4 for _field in FIELDS]
+        samples.append((time, values))
+        telemetry.add(time, values)
+
+    start, end = samples[-300][0], samples[-50][0]
+    result = telemetry.query(start, end, RAW)
+    expected = [(sampleTime, values) for sampleTime, values in samples if start <= sampleTime <= end]
+    assert result['time'] == [sampleTime for sampleTime, _values in expected]
+    for index, field in enumerate(FIELDS):
+        assert result[field] == [values[index] for _sampleTime, values in expected]
+
+    period, _capacity = ROLLUPS['1m']
+    result = telemetry.query(resolution='1m')
+    buckets = {}
+    for sampleTime, values in samples:
+        buckets.setdefault(sampleTime - sampleTime % period, []).append(values)
+    assert result['time'] == sorted(buckets)
+    for index, field in enumerate(FIELDS):
+        fieldValues = [[values[index] for values in buckets[bucket]] for bucket in sorted(buckets)]
+        assert result[field]['min'] == [min(values) for values in fieldValues]
+        assert result[field]['max'] == [max(values) for values in fieldValues]
+        assert result[field]['mean'] == pytest.approx([sum(values) / len(values) for values in fieldValues])
+
+
+def test_resolution_for():
+    telemetry = PowerTelemetry()
+    for index in range(1000):
+        telemetry.add(1_700_000_000.0 + 2 * index, [1.0] * len(FIELDS))
+    assert telemetry.resolutionFor(1_700_000_000.0 + 2 * 999) == RAW
+    assert telemetry.resolutionFor(1_700_000_000.0) == '1m'
+
+
+def test_summary():
+    telemetry = PowerTelemetry()
+    assert telemetry.takeSummary() is None
+    telemetry.add(0.0, [1.0, 2.0, 3.0, 4.0])
+    telemetry.add(1.0, [3.0, 2.0, 1.0, 0.0])
+    summary = telemetry.takeSummary()
+    assert summary['p_all'] == {'min': 1.0, 'mean': 2.0, 'max': 3.0}
+    assert summary['p_l3'] == {'min': 0.0, 'mean': 2.0, 'max': 4.0}
+    assert telemetry.takeSummary() is None
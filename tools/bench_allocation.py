@@ -0,0 +1,48 @@
+"""Benchmark of the load balancing allocation.
+
+Usage: python tools/bench_allocation.py [number of chargers ...]
+"""
+import importlib.util
+import pathlib
+import random
+import sys
+import timeit
+
+# load the module directly, the package itself needs Home Assistant
+_path = pathlib.Path(__file__).parent.parent / "custom_components" / "goecharger" / "allocation.py"
+_spec = importlib.util.spec_from_file_location("allocation", _path)
+allocation = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(allocation)
+
+
+def randomDemands(count, rng):
+    demands = []
+    for index in range(count):
+        phases = allocation.PHASES if rng.random() < 0.7 else (rng.choice(allocation.PHASES),)
+        demands.append(allocation.ChargerDemand(
+            f"charger{index}", rng.choice((16, 20, 32)), phases, rng.random() < 0.8
+        ))
+    return demands
+
+
+def main(counts):
+    rng = random.Random(42)
+    # ampere per charger: the limit is always reached, with 4 A some chargers have to be paused
+    for perCharger in (10.0, 4.0):
+        for count in counts:
+            demands = randomDemands(count, rng)
+            phaseLimits = [perCharger * count] * 3
+            result = allocation.allocateCurrents(demands, phaseLimits)
+            for phase in allocation.PHASES:
+                used = sum(result[demand.name] for demand in demands if phase in demand.phases)
+                assert used <= phaseLimits[phase], (phase, used)
+            paused = sum(1 for current in result.values() if current == 0)
+            runs, total = timeit.Timer(lambda: allocation.allocateCurrents(demands, phaseLimits)).autorange()
+            print(
+                f"{count:5d} chargers, {perCharger:4.1f} A each: {total / runs * 1e6:8.1f} us per allocation, "
+                f"{paused} paused"
+            )
+
+
+if __name__ == "__main__":
+    main([int(count) for count in sys.argv[1:]] or [1, 12, 100, 500])
@@ -0,0 +1,295 @@
+"""Benchmark of the integration with a fleet of simulated chargers.
+
+Starts tools/simulator.py in a subprocess and Home Assistant with the integration in this
+process, then measures for every fleet size:
+
+- setup: time until async_setup of the integration (and, with --config-entries, the setup
+  of all config entries) returned
+- ready: time until every charger got its first update
+- requests: status requests per charger until then, the first update is one sweep over all chargers
+- sweep: time to refresh all chargers at once (p50 / max over --sweeps sweeps)
+- lag: event loop blocking, delay of a 10 ms sleep (p99 / max) while polling
+- executor: jobs submitted to the executor while polling
+- writes/s: state writes per second while polling, with the skipped writes of unchanged values
+- peak: most requests in flight to all chargers at once while polling, sampled every 5 ms
+
+Needs Home Assistant and the goecharger library, e.g. in the environment of a dev container.
+
+Usage: python tools/bench_fleet.py [--chargers 1 10 100 500] [--duration 30] [--v2] [--latency 0.05] [--config-entries]
+"""
+import argparse
+import asyncio
+import inspect
+import logging
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from types import MappingProxyType
+
+from homeassistant import bootstrap, config_entries, loader
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import CoreState, HomeAssistant
+from homeassistant.setup import async_setup_component
+
+ROOT = pathlib.Path(__file__).parent.parent
+DOMAIN = "goecharger"
+PROBE_INTERVAL = 0.01
+IN_FLIGHT_PROBE_INTERVAL = 0.005
+READY_TIMEOUT = 120
+
+
+class LoopLagProbe:
+    """Measures how late a short sleep wakes up, which is the time the loop was blocked."""
+
+    def __init__(self):
+        self.samples = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(PROBE_INTERVAL)
+            self.samples.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        self._task.cancel()
+
+    def percentile(self, fraction):
+        if not self.samples:
+            return 0.0
+        return sorted(self.samples)[min(int(len(self.samples) * fraction), len(self.samples) - 1)]
+
+
+class ExecutorCounter:
+    """Counts the jobs submitted to the executor of the loop and the time they took."""
+
+    def __init__(self, loop):
+        self.jobs = 0
+        self.busy = 0.0
+        runInExecutor = loop.run_in_executor
+
+        def countedRunInExecutor(executor, func, *args):
+            self.jobs += 1
+
+            def timed():
+                start = time.perf_counter()
+                try:
+                    return func(*args)
+                finally:
+                    self.busy += time.perf_counter() - start
+
+            return runInExecutor(executor, timed)
+
+        loop.run_in_executor = countedRunInExecutor
+
+    def reset(self):
+        self.jobs = 0
+        self.busy = 0.0
+
+
+class InFlightProbe:
+    """Samples the requests in flight to all chargers, polls started at the same moment show as a high peak."""
+
+    def __init__(self, clients):
+        self._clients = clients
+        self.peak = 0
+        self._task = None
+
+    async def _run(self):
+        while True:
+            self.peak = max(self.peak, sum(client.inFlight for client in self._clients))
+            await asyncio.sleep(IN_FLIGHT_PROBE_INTERVAL)
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        self._task.cancel()
+
+
+def startSimulator(args, count):
+    command = [
+        sys.executable, str(ROOT / "tools" / "simulator.py"),
+        "--chargers", str(count),
+        "--base-port", str(args.base_port),
+        "--latency", str(args.latency),
+        "--jitter", str(args.jitter),
+        "--timeout-rate", str(args.timeout_rate),
+        "--malformed-rate", str(args.malformed_rate),
+    ]
+    if args.v2:
+        command.append("--v2")
+    simulator = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    # the first line is printed once all chargers are reachable
+    simulator.stdout.readline()
+    return simulator
+
+
+async def startHass(configDir):
+    hass = HomeAssistant(configDir)
+    loader.async_setup(hass)
+    hass.config.skip_pip = True
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    if hasattr(bootstrap, "async_load_base_functionality"):
+        # 2024.3 and later, also initializes the config entries
+        await bootstrap.async_load_base_functionality(hass)
+    else:
+        await hass.config_entries.async_initialize()
+        await bootstrap.load_registries(hass)
+    if hasattr(hass, "set_state"):
+        hass.set_state(CoreState.running)
+    else:
+        hass.state = CoreState.running
+    return hass
+
+
+def configEntry(charger):
+    """Config entry of a charger as created by the config flow."""
+    kwargs = {
+        "version": 1,
+        "minor_version": 1,
+        "domain": DOMAIN,
+        "title": charger["name"],
+        "source": config_entries.SOURCE_USER,
+        "data": {**charger, "scan_interval": 20, "correction_factor": "1.0"},
+        "options": {},
+        "unique_id": None,
+    }
+    if "discovery_keys" in inspect.signature(config_entries.ConfigEntry).parameters:
+        # required from 2024.10 on
+        kwargs["discovery_keys"] = MappingProxyType({})
+    return config_entries.ConfigEntry(**kwargs)
+
+
+async def benchmark(args, count):
+    configDir = tempfile.mkdtemp(prefix="goecharger-bench-")
+    os.makedirs(os.path.join(configDir, "custom_components"))
+    os.symlink(ROOT / "custom_components" / DOMAIN, os.path.join(configDir, "custom_components", DOMAIN))
+
+    loop = asyncio.get_running_loop()
+    executor = ExecutorCounter(loop)
+    probe = LoopLagProbe()
+    hass = await startHass(configDir)
+
+    stateWrites = 0
+
+    def countStateWrite(_event):
+        nonlocal stateWrites
+        stateWrites += 1
+
+    hass.bus.async_listen(EVENT_STATE_CHANGED, countStateWrite)
+
+    chargers = [{"name": f"sim{index}", "host": f"127.0.0.1:{args.base_port + index}"} for index in range(count)]
+    config = {
+        DOMAIN: {
+            "fast_scan_interval": args.fast_scan_interval,
+            "max_parallel_requests": args.max_parallel,
+        }
+    }
+    if not args.config_entries:
+        config[DOMAIN]["chargers"] = [[charger] for charger in chargers]
+    start = time.perf_counter()
+    await async_setup_component(hass, DOMAIN, config)
+    if args.config_entries:
+        entries = [configEntry(charger) for charger in chargers]
+        # like at startup, all entries are set up at the same time
+        await asyncio.gather(*(hass.config_entries.async_add(entry) for entry in entries))
+    setupTime = time.perf_counter() - start
+
+    coordinators = list(hass.data[DOMAIN]["coordinators"].values())
+    apis = list(hass.data[DOMAIN]["api"].values())
+    while any(api.metrics.updates == 0 for api in apis) and time.perf_counter() - start < READY_TIMEOUT:
+        await asyncio.sleep(PROBE_INTERVAL)
+    readyTime = time.perf_counter() - start
+    requests = sum(api.metrics.status.requests for api in apis)
+    await hass.async_block_till_done()
+
+    sweeps = []
+    for _ in range(args.sweeps):
+        # a refresh right after a fetch takes over its result unless values are due, see REFRESH_MERGE_WINDOW
+        for coordinator in coordinators:
+            coordinator.pollTiers.requestFullUpdate()
+        start = time.perf_counter()
+        await asyncio.gather(*(coordinator.async_refresh() for coordinator in coordinators))
+        sweeps.append(time.perf_counter() - start)
+
+    executor.reset()
+    stateWrites = 0
+    skippedBefore = sum(coordinator.skippedStateWrites for coordinator in coordinators)
+    inFlightProbe = InFlightProbe(list(hass.data[DOMAIN]["clients"].values()))
+    probe.start()
+    inFlightProbe.start()
+    await asyncio.sleep(args.duration)
+    inFlightProbe.stop()
+    probe.stop()
+    skipped = sum(coordinator.skippedStateWrites for coordinator in coordinators) - skippedBefore
+    available = sum(1 for coordinator in coordinators if coordinator.last_update_success)
+
+    await hass.async_stop(force=True)
+    return {
+        "setup": setupTime,
+        "ready": readyTime,
+        "requestsPerCharger": requests / count,
+        "sweepP50": statistics.median(sweeps),
+        "sweepMax": max(sweeps),
+        "lagP99": probe.percentile(0.99),
+        "lagMax": max(probe.samples, default=0.0),
+        "executorJobs": executor.jobs,
+        "executorBusy": executor.busy,
+        "writesPerSecond": stateWrites / args.duration,
+        "skippedPerSecond": skipped / args.duration,
+        "available": available,
+        "peakInFlight": inFlightProbe.peak,
+    }
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chargers", type=int, nargs="+", default=[1, 10, 100, 500], help="fleet sizes")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of polling to measure")
+    parser.add_argument("--sweeps", type=int, default=5, help="number of sweeps over all chargers")
+    parser.add_argument("--fast-scan-interval", type=int, default=2, help="poll interval of the chargers")
+    parser.add_argument("--max-parallel", type=int, default=8, help="max_parallel_requests of the integration")
+    parser.add_argument("--base-port", type=int, default=18000)
+    parser.add_argument("--v2", action="store_true", help="simulate v2 chargers")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds every reply is delayed")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--config-entries", action="store_true", help="add the chargers as config entries")
+    return parser.parse_args()
+
+
+def main():
+    args = parseArgs()
+    logging.basicConfig(level=logging.CRITICAL)
+    print(
+        f"{'chargers':>8} {'setup':>8} {'ready':>8} {'requests':>8} {'sweep p50':>10} {'sweep max':>10} {'lag p99':>8} {'lag max':>8} "
+        f"{'executor':>8} {'writes/s':>9} {'skipped/s':>9} {'available':>9} {'peak':>6}"
+    )
+    for count in args.chargers:
+        simulator = startSimulator(args, count)
+        try:
+            result = asyncio.run(benchmark(args, count))
+        finally:
+            simulator.terminate()
+            simulator.wait()
+        print(
+            f"{count:8d} {result['setup'] * 1000:6.0f}ms {result['ready'] * 1000:6.0f}ms "
+            f"{result['requestsPerCharger']:8.1f} {result['sweepP50'] * 1000:8.0f}ms "
+            f"{result['sweepMax'] * 1000:8.0f}ms {result['lagP99'] * 1000:6.1f}ms {result['lagMax'] * 1000:6.1f}ms "
+            f"{result['executorJobs']:8d} {result['writesPerSecond']:9.1f} {result['skippedPerSecond']:9.1f} "
+            f"{result['available']:9d} {result['peakInFlight']:6d}",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
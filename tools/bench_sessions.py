@@ -0,0 +1,64 @@
+"""Benchmark of the session history queries.
+
+Fills the session history of every charger with years of sessions and measures queries of
+one month and of one card over the whole fleet.
+
+Usage: python tools/bench_sessions.py [number of chargers ...]
+"""
+import importlib.util
+import pathlib
+import random
+import sys
+import tempfile
+import timeit
+
+# load the module directly, the package itself needs Home Assistant
+_path = pathlib.Path(__file__).parent.parent / "custom_components" / "goecharger" / "history.py"
+_spec = importlib.util.spec_from_file_location("history", _path)
+history = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(history)
+
+YEARS = 5
+SESSIONS_PER_DAY = 3
+DAY = 86400
+START = 1_500_000_000
+
+
+def fillRing(ring, rng):
+    """Append YEARS of sessions with random gaps, returns the time of the last session."""
+    now = START
+    for _ in range(YEARS * 365 * SESSIONS_PER_DAY):
+        now += rng.uniform(0, 2 * DAY / SESSIONS_PER_DAY)
+        duration = rng.uniform(600, 6 * 3600)
+        ring.append(history.Session(now, now + duration, rng.uniform(1, 40), rng.uniform(3.7, 22), rng.randint(0, 10)))
+        now += duration
+    return now
+
+
+def main(counts):
+    rng = random.Random(42)
+    for count in counts:
+        with tempfile.TemporaryDirectory() as directory:
+            rings = [history.SessionRing(f"{directory}/charger{index}.sessions") for index in range(count)]
+            end = max(fillRing(ring, rng) for ring in rings)
+            monthStart = end - 400 * DAY
+
+            def month():
+                return [session for ring in rings for session in ring.query(monthStart, monthStart + 30 * DAY)]
+
+            def card():
+                return [session for ring in rings for session in ring.query(monthStart, None, card=3)]
+
+            for name, query in (("one month", month), ("one card, 400 days", card)):
+                sessions = len(query())
+                runs, total = timeit.Timer(query).autorange()
+                print(
+                    f"{count:5d} chargers, {len(rings[0])} sessions each, {name}: "
+                    f"{total / runs * 1000:8.2f} ms per query, {sessions} sessions"
+                )
+            for ring in rings:
+                ring.close()
+
+
+if __name__ == "__main__":
+    main([int(count) for count in sys.argv[1:]] or [1, 10, 100])
@@ -0,0 +1,249 @@
+"""Local simulator of go-eChargers for development and benchmarks.
+
+Every simulated charger listens on its own port of localhost and serves the v1 api
+(/status, /mqtt?payload=) and, with --v2, the v2 api (/api/status, /api/set).
+
+Usage: python tools/simulator.py --chargers 10 --base-port 18000 [--v2] [--latency 0.05]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from aiohttp import web
+
+# car status: 1 no car, 2 charging, 3 waiting for the car, 4 charging finished
+CAR_NO_CAR, CAR_CHARGING, CAR_WAITING, CAR_FINISHED = 1, 2, 3, 4
+
+VOLTAGE = 230
+# mean seconds a car status lasts, before the next one follows
+STATUS_DURATION = {CAR_NO_CAR: 300, CAR_CHARGING: 600, CAR_WAITING: 60, CAR_FINISHED: 300}
+NEXT_STATUS = {CAR_NO_CAR: CAR_CHARGING, CAR_CHARGING: CAR_FINISHED, CAR_WAITING: CAR_CHARGING, CAR_FINISHED: CAR_NO_CAR}
+
+
+class Faults:
+    """Injected misbehaviour of the simulated chargers."""
+
+    def __init__(self, latency=0.0, jitter=0.0, timeoutRate=0.0, timeoutDelay=30.0, malformedRate=0.0, errorRate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.timeoutRate = timeoutRate
+        self.timeoutDelay = timeoutDelay
+        self.malformedRate = malformedRate
+        self.errorRate = errorRate
+
+    async def apply(self, rng):
+        """Delay the reply, returns a reply which replaces the regular one or None."""
+        delay = self.latency + rng.uniform(0, self.jitter)
+        if rng.random() < self.timeoutRate:
+            delay = self.timeoutDelay
+        if delay:
+            await asyncio.sleep(delay)
+        if rng.random() < self.errorRate:
+            return web.Response(status=500, text="internal error")
+        if rng.random() < self.malformedRate:
+            return web.Response(text='{"car":"2","amp":', content_type="application/json")
+        return None
+
+
+class SimulatedCharger:
+    """State of one charger, advanced lazily whenever it is requested."""
+
+    def __init__(self, serial, v2, rng, phases=3):
+        self.serial = serial
+        self.v2 = v2
+        self._rng = rng
+        self.phases = phases
+        self.car = rng.choice((CAR_NO_CAR, CAR_CHARGING, CAR_WAITING))
+        self.amp = 16
+        self.ama = 32
+        self.cbl = rng.choice((0, 16, 20, 32))
+        self.alw = True
+        self.ust = 0
+        self.dwo = 0  # charge limit in 0.1 kWh, 0 is no limit
+        self.sessionWs = 0.0
+        self.totalWs = rng.uniform(0, 5e9)
+        self._statusUntil = time.monotonic() + self._statusDuration()
+        self._updated = time.monotonic()
+        self.requests = 0
+
+    def _statusDuration(self):
+        return self._rng.expovariate(1 / STATUS_DURATION[self.car])
+
+    def current(self):
+        if self.car != CAR_CHARGING or not self.alw:
+            return 0
+        return min(self.amp, self.cbl or self.amp)
+
+    def advance(self, now=None):
+        now = time.monotonic() if now is None else now
+        energy = self.current() * VOLTAGE * self.phases * (now - self._updated)
+        self.sessionWs += energy
+        self.totalWs += energy
+        self._updated = now
+        if self.dwo and self.car == CAR_CHARGING and self.sessionWs >= self.dwo * 360000:
+            self.car = CAR_FINISHED
+            self._statusUntil = now + self._statusDuration()
+        if now >= self._statusUntil:
+            self.car = NEXT_STATUS[self.car]
+            if self.car == CAR_CHARGING:
+                self.sessionWs = 0.0
+            self._statusUntil = now + self._statusDuration()
+
+    def _nrg(self, scale):
+        current = self.current()
+        currents = [current if phase < self.phases else 0 for phase in range(3)]
+        powers = [VOLTAGE * i / 1000 for i in currents]
+        return (
+            [VOLTAGE, VOLTAGE, VOLTAGE, 0]
+            + [round(i * scale[0]) for i in currents]
+            + [round(p * scale[1]) for p in powers]
+            + [0, round(sum(powers) * scale[2]), 99, 99, 99, 0]
+        )
+
+    def statusV1(self):
+        return {
+            "version": "B", "car": str(self.car), "amp": str(self.amp), "ama": str(self.ama),
+            "err": "0", "ast": str(self.ust and 1), "alw": "1" if self.alw else "0", "stp": "0",
+            "cbl": str(self.cbl), "pha": "63", "tmp": "25", "tma": [25.0, 25.0, 25.0, 25.0],
+            "dws": str(int(self.sessionWs / 10)), "dwo": str(self.dwo), "adi": "0", "uby": "0",
+            "eto": str(int(self.totalWs / 360000)), "wst": "3", "nrg": self._nrg((10, 10, 100)),
+            "fwv": "040", "sse": self.serial, "wss": "simulator", "wen": "1", "tof": "101", "tds": "1",
+            "ust": str(self.ust),
+        }
+
+    def statusV2(self):
+        return {
+            "car": self.car, "amp": self.amp, "ama": self.ama, "err": 0, "acs": 0, "alw": self.alw,
+            "ust": self.ust, "cbl": self.cbl or None, "pha": [True] * 6, "tma": [25.0, 25.0],
+            "wh": self.sessionWs / 3600, "dwo": self.dwo * 100 or None, "adi": False, "trx": None,
+            "eto": int(self.totalWs / 3600), "wst": 3, "nrg": self._nrg((1, 1000, 1000)), "fwv": "055",
+            "sse": self.serial, "ccw": {"ssid": "simulator"}, "wen": True, "tof": 60, "tds": 1,
+        }
+
+    def setV1(self, key, value):
+        if key in ("amp", "amx"):
+            self.amp = min(max(int(value), 6), self.ama)
+        elif key == "ama":
+            self.ama = min(max(int(value), 6), 32)
+            self.amp = min(self.amp, self.ama)
+        elif key == "alw":
+            self.alw = value == "1"
+        elif key == "dwo":
+            self.dwo = int(value)
+        elif key == "ust":
+            self.ust = int(value)
+        else:
+            return False
+        return True
+
+    def setV2(self, key, value):
+        value = json.loads(value)
+        if key == "dwo":
+            return self.setV1(key, str(round(value / 100)) if value else "0")
+        if key == "alw":
+            value = "1" if value else "0"
+        return self.setV1(key, str(value))
+
+
+class Simulator:
+    """Serves the simulated chargers, one port per charger."""
+
+    def __init__(self, count, basePort=18000, v2=False, faults=None, seed=0):
+        self._rng = random.Random(seed)
+        self.basePort = basePort
+        self.faults = faults or Faults()
+        self.chargers = {
+            basePort + index: SimulatedCharger(f"{index:06d}", v2, self._rng) for index in range(count)
+        }
+        self._runner = None
+
+    def hosts(self):
+        return [f"127.0.0.1:{port}" for port in self.chargers]
+
+    def _charger(self, request):
+        charger = self.chargers[request.transport.get_extra_info("sockname")[1]]
+        charger.requests += 1
+        charger.advance()
+        return charger
+
+    async def _status(self, request):
+        charger = self._charger(request)
+        return await self.faults.apply(self._rng) or web.json_response(charger.statusV1())
+
+    async def _mqtt(self, request):
+        charger = self._charger(request)
+        key, _, value = request.query.get("payload", "").partition("=")
+        if not charger.setV1(key, value):
+            raise web.HTTPBadRequest(text=f"unknown key {key}")
+        return await self.faults.apply(self._rng) or web.json_response(charger.statusV1())
+
+    async def _apiStatus(self, request):
+        charger = self._charger(request)
+        if not charger.v2:
+            raise web.HTTPNotFound()
+        status = charger.statusV2()
+        if "filter" in request.query:
+            keys = request.query["filter"].split(",")
+            status = {key: value for key, value in status.items() if key in keys}
+        return await self.faults.apply(self._rng) or web.json_response(status)
+
+    async def _apiSet(self, request):
+        charger = self._charger(request)
+        if not charger.v2:
+            raise web.HTTPNotFound()
+        result = {key: charger.setV2(key, value) for key, value in request.query.items()}
+        return await self.faults.apply(self._rng) or web.json_response(result)
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/status", self._status)
+        app.router.add_get("/mqtt", self._mqtt)
+        app.router.add_get("/api/status", self._apiStatus)
+        app.router.add_get("/api/set", self._apiSet)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        for port in self.chargers:
+            await web.TCPSite(self._runner, "127.0.0.1", port).start()
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+
+def parseArgs(args=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chargers", type=int, default=1, help="number of simulated chargers")
+    parser.add_argument("--base-port", type=int, default=18000, help="port of the first charger")
+    parser.add_argument("--v2", action="store_true", help="offer the v2 api too")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds every reply is delayed")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random additional delay up to this")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="fraction of requests never answered in time")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="fraction of replies with broken json")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of replies with http status 500")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(args)
+
+
+async def main(args):
+    simulator = Simulator(
+        args.chargers,
+        args.base_port,
+        args.v2,
+        Faults(args.latency, args.jitter, args.timeout_rate, malformedRate=args.malformed_rate, errorRate=args.error_rate),
+        args.seed,
+    )
+    await simulator.start()
+    # the first line tells a parent process that the chargers are reachable
+    print(f"simulating {args.chargers} chargers on ports {args.base_port}-{args.base_port + args.chargers - 1}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await simulator.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main(parseArgs()))
+    except KeyboardInterrupt:
+        pass